@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from sqlalchemy import create_engine, text
+from migrations import upgrade
+
+STATES = ("RUNNING", "FAILED", "BOOTING", "REBOOTING")
+
+BEFORE_QUERIES = {
+    "count_all": "SELECT COUNT(*) FROM server",
+    "count_by_status": "SELECT status, COUNT(*) FROM server GROUP BY status",
+    "filter_status": "SELECT id FROM server WHERE status = 'REBOOTING' LIMIT 100",
+    "lookup_hostname": "SELECT id FROM server WHERE hostname = :hostname",
+    "lookup_ip": "SELECT id FROM server WHERE ip_address = :ip",
+}
+
+AFTER_QUERIES = dict(BEFORE_QUERIES, **{
+    "count_all": "SELECT SUM(total) FROM server_status_counts",
+    "count_by_status": "SELECT status, total FROM server_status_counts",
+})
+
+def _create_legacy_schema(engine, rows):
+    # Mirrors the table produced by db.create_all() before indexes were added
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE server (id INTEGER PRIMARY KEY, hostname VARCHAR(64) NOT NULL, "
+            "ip_address VARCHAR(64) NOT NULL, status VARCHAR(20), cpu_usage FLOAT, "
+            "memory_usage INTEGER, uptime INTEGER)"
+        ))
+        batch = []
+        for i in range(rows):
+            batch.append({
+                "hostname": f"host-{i}",
+                "ip": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+                "status": random.choices(STATES, weights=(90, 6, 3, 1))[0],
+            })
+            if len(batch) == 50000:
+                conn.execute(text(
+                    "INSERT INTO server (hostname, ip_address, status, cpu_usage, memory_usage, uptime) "
+                    "VALUES (:hostname, :ip, :status, 0, 0, 0)"
+                ), batch)
+                batch = []
+        if batch:
+            conn.execute(text(
+                "INSERT INTO server (hostname, ip_address, status, cpu_usage, memory_usage, uptime) "
+                "VALUES (:hostname, :ip, :status, 0, 0, 0)"
+            ), batch)
+
+def _time_queries(engine, queries, rows, repeats):
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in queries.items():
+            samples = []
+            for _ in range(repeats):
+                i = random.randrange(rows)
+                params = {"hostname": f"host-{i}", "ip": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"}
+                start = time.perf_counter()
+                conn.execute(text(sql), params).all()
+                samples.append(time.perf_counter() - start)
+            results[name] = {"median_ms": round(statistics.median(samples) * 1000, 3)}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Server table query timings before/after schema migrations")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        _create_legacy_schema(engine, args.rows)
+        before = _time_queries(engine, BEFORE_QUERIES, args.rows, args.repeats)
+
+        start = time.perf_counter()
+        upgrade(engine)
+        migration_s = time.perf_counter() - start
+        after = _time_queries(engine, AFTER_QUERIES, args.rows, args.repeats)
+        engine.dispose()
+
+    print(json.dumps({
+        "rows": args.rows,
+        "migration_seconds": round(migration_s, 3),
+        "before": before,
+        "after": after,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
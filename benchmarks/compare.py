@@ -0,0 +1,93 @@
+import argparse
+import json
+import statistics
+import sys
+
+# Scale factor that turns a MAD into a standard-deviation estimate for normal noise
+MAD_TO_SIGMA = 1.4826
+
+def _stats(entry):
+    samples = entry.get("samples")
+    if samples:
+        median = statistics.median(samples)
+        mad = statistics.median(abs(s - median) for s in samples)
+        return median, mad
+    return entry["median"], entry.get("mad", 0.0)
+
+def _budget_for(name, default, budgets):
+    # Longest matching prefix wins, so "metrics_render" can be stricter than the default
+    matches = [prefix for prefix in budgets if name.startswith(prefix)]
+    return budgets[max(matches, key=len)] if matches else default
+
+def compare(baseline, candidate, budget=0.10, mad_factor=3.0, budgets=None):
+    # A benchmark regresses only if its median slowed down by more than the
+    # relative budget AND by more than mad_factor noise sigmas of both runs.
+    budgets = budgets or {}
+    base, cand = baseline["benchmarks"], candidate["benchmarks"]
+    rows = []
+    for name in sorted(set(base) & set(cand)):
+        base_median, base_mad = _stats(base[name])
+        cand_median, cand_mad = _stats(cand[name])
+        delta = cand_median - base_median
+        rel = delta / base_median if base_median else 0.0
+        noise = mad_factor * MAD_TO_SIGMA * (base_mad + cand_mad)
+        allowed = _budget_for(name, budget, budgets)
+        if delta > noise and rel > allowed:
+            verdict = "regression"
+        elif -delta > noise and -rel > allowed:
+            verdict = "improvement"
+        else:
+            verdict = "ok"
+        rows.append({
+            "name": name,
+            "baseline": base_median,
+            "candidate": cand_median,
+            "delta_pct": round(rel * 100, 2),
+            "noise": noise,
+            "budget_pct": round(allowed * 100, 2),
+            "verdict": verdict,
+        })
+    return {
+        "results": rows,
+        "missing": sorted(set(base) - set(cand)),
+        "added": sorted(set(cand) - set(base)),
+        "regressions": [r["name"] for r in rows if r["verdict"] == "regression"],
+    }
+
+def format_report(report):
+    lines = [f"{'benchmark':<50} {'baseline ms':>12} {'candidate ms':>13} {'delta':>9} {'budget':>7}  verdict"]
+    for r in report["results"]:
+        lines.append(
+            f"{r['name']:<50} {r['baseline'] * 1000:12.3f} {r['candidate'] * 1000:13.3f} "
+            f"{r['delta_pct']:+8.2f}% {r['budget_pct']:6.1f}%  {r['verdict']}"
+        )
+    for name in report["missing"]:
+        lines.append(f"{name:<50} missing from candidate")
+    return "\n".join(lines)
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmarks/run.py result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--budget", type=float, default=0.10, help="allowed relative slowdown, default 0.10 (10%%)")
+    parser.add_argument("--mad-factor", type=float, default=3.0, help="noise sigmas a delta must exceed")
+    parser.add_argument("--budgets", help="JSON file mapping benchmark name prefixes to relative budgets")
+    parser.add_argument("--json", action="store_true", help="print the comparison as JSON")
+    args = parser.parse_args()
+
+    report = compare(
+        _load(args.baseline), _load(args.candidate),
+        budget=args.budget, mad_factor=args.mad_factor,
+        budgets=_load(args.budgets) if args.budgets else None,
+    )
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    if report["regressions"]:
+        print(f"\n{len(report['regressions'])} benchmark(s) regressed beyond budget", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
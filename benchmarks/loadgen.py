@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Production-like mix: Prometheus scraping every 5s, dashboards polling
+# per-server metrics, and an inventory sync doing periodic CRUD bursts.
+DEFAULT_PROFILE = {
+    "duration": 60,
+    "seed_servers": 200,
+    "actors": [
+        {"action": "scrape", "interval": 5, "threads": 1},
+        {"action": "dashboard_poll", "interval": 2, "threads": 10},
+        {"action": "list_servers", "interval": 10, "threads": 2},
+        {"action": "inventory_burst", "interval": 30, "threads": 1, "burst": 50},
+    ],
+}
+
+# -----------------------------
+# CLIENTS
+# -----------------------------
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if data is not None:
+            req.add_header("Content-Type", "application/json")
+        try:
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                payload = resp.read()
+                return resp.status, payload
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+class InProcessClient:
+    # Drives the app through the Flask test client against a throwaway SQLite
+    # file, so the whole harness runs offline without a server or PostgreSQL.
+    def __init__(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(self._tmp.name, 'loadgen.db')}")
+        os.environ.setdefault("REQUEST_LOG_ENABLED", "false")
+        sys.path.insert(0, SRC)
+        from app import app
+        from db import db
+        from migrations import upgrade
+        with app.app_context():
+            upgrade(db.engine)
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        resp = client.open(path, method=method, json=body)
+        return resp.status_code, resp.get_data()
+
+# -----------------------------
+# ACTIONS
+# -----------------------------
+class Fleet:
+    def __init__(self):
+        self.ids = []
+        self.lock = threading.Lock()
+        self.counter = 0
+
+    def sample(self):
+        with self.lock:
+            return random.choice(self.ids) if self.ids else None
+
+    def next_names(self, n):
+        with self.lock:
+            start = self.counter
+            self.counter += n
+        return [f"load-{os.getpid()}-{i}" for i in range(start, start + n)]
+
+def _bulk_create(client, fleet, stats, n):
+    names = fleet.next_names(n)
+    body = [{"hostname": h, "ip_address": f"10.250.{i >> 8 & 255}.{i & 255}"} for i, h in enumerate(names)]
+    status, payload = stats.timed(client, "POST", "/servers/bulk", "POST /servers/bulk", body)
+    if status in (201, 207):
+        ids = [r["id"] for r in json.loads(payload)["results"] if "id" in r]
+        with fleet.lock:
+            fleet.ids.extend(ids)
+        return ids
+    return []
+
+def action_scrape(client, fleet, stats, actor):
+    stats.timed(client, "GET", "/metrics", "GET /metrics")
+
+def action_dashboard_poll(client, fleet, stats, actor):
+    sid = fleet.sample()
+    if sid is not None:
+        stats.timed(client, "GET", f"/servers/{sid}/metrics", "GET /servers/<id>/metrics")
+
+def action_list_servers(client, fleet, stats, actor):
+    stats.timed(client, "GET", "/servers/?limit=500", "GET /servers/")
+
+def action_inventory_burst(client, fleet, stats, actor):
+    ids = _bulk_create(client, fleet, stats, actor.get("burst", 50))
+    for sid in ids[: len(ids) // 2]:
+        stats.timed(client, "PUT", f"/servers/{sid}", "PUT /servers/<id>", {"status": "REBOOTING"})
+    doomed = ids[len(ids) // 2:]
+    if doomed:
+        with fleet.lock:
+            fleet.ids = [i for i in fleet.ids if i not in set(doomed)]
+        stats.timed(client, "DELETE", "/servers/bulk", "DELETE /servers/bulk", {"ids": doomed})
+
+ACTIONS = {
+    "scrape": action_scrape,
+    "dashboard_poll": action_dashboard_poll,
+    "list_servers": action_list_servers,
+    "inventory_burst": action_inventory_burst,
+}
+
+# -----------------------------
+# STATS
+# -----------------------------
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def timed(self, client, method, path, route, body=None):
+        start = time.perf_counter()
+        try:
+            status, payload = client.request(method, path, body)
+        except Exception:
+            status, payload = 0, b""
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.latencies[route].append(elapsed)
+            if status == 0 or status >= 500:
+                self.errors[route] += 1
+        return status, payload
+
+    def report(self, duration):
+        def pct(values, q):
+            return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+        routes = {}
+        for route, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            routes[route] = {
+                "requests": len(values),
+                "throughput_rps": round(len(values) / duration, 2),
+                "p50_ms": round(pct(values, 0.50), 2),
+                "p90_ms": round(pct(values, 0.90), 2),
+                "p99_ms": round(pct(values, 0.99), 2),
+                "max_ms": round(values[-1] * 1000, 2),
+                "error_rate": round(self.errors[route] / len(values), 4),
+            }
+        return routes
+
+def _actor_loop(actor, client, fleet, stats, stop, speed):
+    interval = actor["interval"] / speed
+    action = ACTIONS[actor["action"]]
+    # Spread actors so they do not all fire on the same instant
+    if stop.wait(random.uniform(0, interval)):
+        return
+    while not stop.is_set():
+        started = time.monotonic()
+        action(client, fleet, stats, actor)
+        stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+def run(client, profile, speed=1.0):
+    fleet, stats = Fleet(), Stats()
+    remaining = profile.get("seed_servers", 0)
+    while remaining > 0:
+        _bulk_create(client, fleet, stats, min(remaining, 1000))
+        remaining -= 1000
+    stats.latencies.clear()
+    stats.errors.clear()
+
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=_actor_loop, args=(actor, client, fleet, stats, stop, speed), daemon=True)
+        for actor in profile["actors"] for _ in range(actor.get("threads", 1))
+    ]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    time.sleep(profile["duration"])
+    stop.set()
+    for t in threads:
+        t.join()
+    return stats.report(time.monotonic() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a production-like request mix against Infra Monitor")
+    parser.add_argument("--url", help="base URL of a running app; omit to run in-process against SQLite")
+    parser.add_argument("--profile", help="JSON file with duration, seed_servers and actors")
+    parser.add_argument("--duration", type=float, help="override the profile duration in seconds")
+    parser.add_argument("--speed", type=float, default=1.0, help="divide every actor interval by this factor")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    profile = dict(DEFAULT_PROFILE)
+    if args.profile:
+        with open(args.profile) as f:
+            profile.update(json.load(f))
+    if args.duration is not None:
+        profile["duration"] = args.duration
+
+    client = HttpClient(args.url) if args.url else InProcessClient()
+    report = {"target": args.url or "in-process", "profile": profile, "speed": args.speed,
+              "routes": run(client, profile, args.speed)}
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(body + "\n")
+    else:
+        print(body)
+
+if __name__ == "__main__":
+    main()
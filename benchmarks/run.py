@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# The suite runs against the in-memory SQLite test configuration with the
+# background simulator thread disabled so it does not add noise.
+os.environ.setdefault("FLASK_ENV", "testing")
+os.environ.setdefault("SIMULATOR_ENABLED", "false")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from flask.json.provider import DefaultJSONProvider
+from prometheus_client import generate_latest
+from sqlalchemy import insert
+from app import app
+from db import db, Server
+from metrics import server_cpu, server_memory, server_state
+from serialization import OrjsonProvider, orjson
+import servers
+
+BENCHMARKS = []
+
+def benchmark(name, sized=False):
+    def register(fn):
+        BENCHMARKS.append((name, sized, fn))
+        return fn
+    return register
+
+def measure(fn, repeats, setup=None):
+    samples = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def summarize(samples):
+    median = statistics.median(samples)
+    mad = statistics.median(abs(s - median) for s in samples)
+    return {"samples": samples, "median": median, "mad": mad, "min": min(samples), "unit": "s"}
+
+def _reset_db(rows=0):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    servers._sim_map.clear()
+    if rows:
+        db.session.execute(insert(Server), [
+            {"hostname": f"bench-{i}", "ip_address": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"}
+            for i in range(rows)
+        ])
+        db.session.commit()
+
+# -----------------------------
+# SIMULATION
+# -----------------------------
+@benchmark("simulated_server_update", sized=True)
+def bench_simulated_server_update(size, repeats):
+    _reset_db(size)
+    sims = [servers._new_sim(i, "RUNNING") for i in range(1, size + 1)]
+
+    def run():
+        for sim in sims:
+            sim.update()
+    return measure(run, repeats)
+
+@benchmark("get_all_servers", sized=True)
+def bench_get_all_servers(size, repeats):
+    _reset_db(size)
+    original = servers.simulated_servers[:]
+    servers.simulated_servers[:] = [servers.SimulatedServer(i) for i in range(1, size + 1)]
+    try:
+        return measure(servers.get_all_servers, repeats)
+    finally:
+        servers.simulated_servers[:] = original
+
+@benchmark("simulated_servers_read", sized=True)
+def bench_simulated_servers_read(size, repeats):
+    original = servers.simulated_servers[:]
+    servers.simulated_servers[:] = [servers.SimulatedServer(i) for i in range(1, size + 1)]
+    servers.publish_snapshot()
+    client = app.test_client()
+    try:
+        return measure(lambda: client.get("/simulated-servers"), repeats)
+    finally:
+        servers.simulated_servers[:] = original
+        servers.publish_snapshot()
+
+@benchmark("get_simulated_metrics_for_db_servers", sized=True)
+def bench_db_server_metrics(size, repeats):
+    _reset_db(size)
+    servers.get_simulated_metrics_for_db_servers()
+    return measure(servers.get_simulated_metrics_for_db_servers, repeats)
+
+# -----------------------------
+# EXPOSITION
+# -----------------------------
+@benchmark("metrics_render", sized=True)
+def bench_metrics_render(size, repeats):
+    for gauge in (server_cpu, server_memory, server_state):
+        gauge.clear()
+        for i in range(size):
+            gauge.labels(server_id=str(i)).set(i)
+    try:
+        return measure(generate_latest, repeats)
+    finally:
+        for gauge in (server_cpu, server_memory, server_state):
+            gauge.clear()
+
+# -----------------------------
+# CRUD LATENCY
+# -----------------------------
+@benchmark("crud_roundtrip")
+def bench_crud_roundtrip(repeats):
+    _reset_db()
+    client = app.test_client()
+    counter = iter(range(10 ** 9))
+
+    def run():
+        n = next(counter)
+        sid = client.post("/servers/", json={"hostname": f"crud-{n}", "ip_address": "10.0.0.1"}).get_json()["id"]
+        client.get(f"/servers/{sid}")
+        client.put(f"/servers/{sid}", json={"status": "FAILED"})
+        client.delete(f"/servers/{sid}")
+    return measure(run, repeats)
+
+@benchmark("list_servers", sized=True)
+def bench_list_servers(size, repeats):
+    _reset_db(size)
+    client = app.test_client()
+    return measure(lambda: client.get("/servers/"), repeats)
+
+# -----------------------------
+# SERIALIZATION
+# -----------------------------
+def _listing_rows(size):
+    return [(i, f"bench-{i}", f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", "RUNNING") for i in range(size)]
+
+def _bench_serialize(provider, size, repeats, compact=False):
+    rows = _listing_rows(size)
+    fields = servers.DEFAULT_SERVER_FIELDS
+    project = servers._row_projector(fields)
+    if compact:
+        return measure(lambda: provider.response({"fields": list(fields), "rows": rows}), repeats)
+    return measure(lambda: provider.response(list(map(project, rows))), repeats)
+
+@benchmark("serialize_servers_stdlib", sized=True)
+def bench_serialize_stdlib(size, repeats):
+    return _bench_serialize(DefaultJSONProvider(app), size, repeats)
+
+@benchmark("serialize_servers_orjson", sized=True)
+def bench_serialize_orjson(size, repeats):
+    # Skipped rather than timing the stdlib encoder under this name
+    if orjson is None:
+        return None
+    return _bench_serialize(OrjsonProvider(app), size, repeats)
+
+@benchmark("serialize_servers_rows", sized=True)
+def bench_serialize_rows(size, repeats):
+    return _bench_serialize(app.json, size, repeats, compact=True)
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+def run(sizes, repeats, name_filter=None):
+    results = {}
+    with app.app_context():
+        for name, sized, fn in BENCHMARKS:
+            for size in (sizes if sized else [None]):
+                key = name if size is None else f"{name}[{size}]"
+                if name_filter and name_filter not in key:
+                    continue
+                samples = fn(size, repeats) if sized else fn(repeats)
+                if samples is None:
+                    print(f"{key:<50} skipped", file=sys.stderr)
+                    continue
+                results[key] = summarize(samples)
+                print(f"{key:<50} median {results[key]['median'] * 1000:10.3f} ms", file=sys.stderr)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "repeats": repeats,
+            "sizes": sizes,
+        },
+        "benchmarks": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Infra Monitor hot-path benchmarks")
+    parser.add_argument("--sizes", default="1000", help="comma-separated fleet sizes, e.g. 1000,10000,100000")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this string")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    results = run(sizes, args.repeats, args.filter)
+    body = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(body + "\n")
+    else:
+        print(body)
+
+if __name__ == "__main__":
+    main()
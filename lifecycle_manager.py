@@ -1,18 +1,20 @@
 import time
 from app import app
-from db import db, Server
+from db import BACKGROUND_BIND, bound_to, db, Server
 from servers import _ensure_sim_for_dbserver
+from sql_stats import sql_scope
 
 def main():
-    with app.app_context():
+    with app.app_context(), bound_to(BACKGROUND_BIND):
         try:
             while True:
                 print("Updating simulated server states...")
-                servers = Server.query.all()
-                for server in servers:
-                    sim = _ensure_sim_for_dbserver(server)
-                    sim.update()
-                db.session.commit()
+                with sql_scope("lifecycle_manager_tick", app.config["SQL_STATEMENT_BUDGET"]):
+                    servers = Server.query.all()
+                    for server in servers:
+                        sim = _ensure_sim_for_dbserver(server)
+                        sim.update()
+                    db.session.commit()
                 print("Server states updated. Waiting 10 seconds...")
                 time.sleep(10)
         except KeyboardInterrupt:
@@ -0,0 +1,186 @@
+import re
+import threading
+import time
+from array import array
+from flask import Blueprint, current_app, jsonify, request
+from servers import _sim_map, simulated_servers
+
+UP_STATE = "RUNNING"
+_WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# -----------------------------
+# AVAILABILITY TRACKER
+# -----------------------------
+# Fed by lifecycle transitions. Each server keeps a fixed ring of time buckets
+# holding (up seconds, down seconds, failures, repairs, repair seconds), so
+# memory is servers x buckets no matter how often servers flap. Time is only
+# written into buckets when the state changes; the open interval since the last
+# transition is added at query time. Windows are answered from bucket
+# boundaries: the last N whole buckets plus the current, partial one.
+# Anything other than RUNNING counts as down; a repair is the time from
+# leaving RUNNING until it is entered again.
+
+_FIELDS = 5
+
+class _History:
+    __slots__ = ("state", "since", "down_since", "sums", "slots")
+
+    def __init__(self, state, since, buckets):
+        self.state = state
+        self.since = since
+        self.down_since = None if state == UP_STATE else since
+        self.sums = array("d", bytes(8 * _FIELDS * buckets))
+        # Absolute bucket index held by each ring slot, -1 when unused
+        self.slots = array("q", [-1]) * buckets
+
+    def slot(self, index):
+        i = index % len(self.slots)
+        base = i * _FIELDS
+        if self.slots[i] != index:
+            self.slots[i] = index
+            self.sums[base:base + _FIELDS] = array("d", bytes(8 * _FIELDS))
+        return base
+
+class AvailabilityTracker:
+    def __init__(self, retention=7 * 86400, bucket_seconds=3600):
+        self._servers = {}
+        self._lock = threading.Lock()
+        self.configure(retention, bucket_seconds)
+
+    def configure(self, retention, bucket_seconds):
+        with self._lock:
+            self.retention = retention
+            self.bucket_seconds = bucket_seconds
+            # One extra slot for the bucket still being filled
+            self.buckets = -(-retention // bucket_seconds) + 1
+            self._servers.clear()
+
+    def ensure(self, server_id, state, since):
+        with self._lock:
+            if server_id not in self._servers:
+                self._servers[server_id] = _History(state, since, self.buckets)
+
+    def _accrue(self, history, end):
+        field = 0 if history.state == UP_STATE else 1
+        start = max(history.since, end - self.retention - self.bucket_seconds)
+        while start < end:
+            index = int(start // self.bucket_seconds)
+            stop = min(end, (index + 1) * self.bucket_seconds)
+            history.sums[history.slot(index) + field] += stop - start
+            start = stop
+
+    def record(self, event):
+        server_id, ts, from_state, to_state, duration = event
+        with self._lock:
+            history = self._servers.get(server_id)
+            if history is None:
+                history = self._servers[server_id] = _History(from_state, ts - duration, self.buckets)
+            ts = max(ts, history.since)
+            self._accrue(history, ts)
+            base = history.slot(int(ts // self.bucket_seconds))
+            if to_state == "FAILED":
+                history.sums[base + 2] += 1
+            if to_state == UP_STATE and history.down_since is not None:
+                history.sums[base + 3] += 1
+                history.sums[base + 4] += ts - history.down_since
+                history.down_since = None
+            elif to_state != UP_STATE and history.down_since is None:
+                history.down_since = ts
+            history.state, history.since = to_state, ts
+
+    def retain(self, server_ids):
+        with self._lock:
+            for server_id in set(self._servers) - set(server_ids):
+                del self._servers[server_id]
+
+    def window_buckets(self, window):
+        # Whole buckets a window covers, capped at the retention
+        return min(max(1, -(-window // self.bucket_seconds)), self.buckets - 1)
+
+    def summary(self, window, now=None):
+        now = time.time() if now is None else now
+        current = int(now // self.bucket_seconds)
+        first = current - self.window_buckets(window)
+        start = first * self.bucket_seconds
+        result = {}
+        with self._lock:
+            for server_id, history in self._servers.items():
+                totals = [0.0] * _FIELDS
+                for i, index in enumerate(history.slots):
+                    if first <= index <= current:
+                        for field in range(_FIELDS):
+                            totals[field] += history.sums[i * _FIELDS + field]
+                open_seconds = max(0.0, now - max(history.since, start))
+                totals[0 if history.state == UP_STATE else 1] += open_seconds
+                totals[2], totals[3] = int(totals[2]), int(totals[3])
+                result[server_id] = tuple(totals)
+        return result
+
+availability = AvailabilityTracker()
+
+def _stats(up, down, failures, repairs, repair_time):
+    observed = up + down
+    return {
+        "uptime_fraction": round(up / observed, 6) if observed else None,
+        "observed_seconds": round(observed, 3),
+        "failures": failures,
+        "mtbf_seconds": round(up / failures, 3) if failures else None,
+        "mttr_seconds": round(repair_time / repairs, 3) if repairs else None,
+    }
+
+def availability_report(tracker, window, now=None):
+    per_server = tracker.summary(window, now)
+    totals = [sum(column) for column in zip(*per_server.values())] or [0.0, 0.0, 0, 0, 0.0]
+    return {
+        "window_seconds": tracker.window_buckets(window) * tracker.bucket_seconds,
+        "fleet": dict(_stats(*totals), servers=len(per_server)),
+        "servers": [dict(_stats(*sums), id=server_id) for server_id, sums in sorted(per_server.items())],
+    }
+
+# -----------------------------
+# Flask Blueprint
+# -----------------------------
+analytics_bp = Blueprint("analytics", __name__)
+_report_cache = {}
+_report_lock = threading.Lock()
+
+def parse_window(value):
+    match = re.fullmatch(r"(\d+)([smhd]?)", (value or "").strip())
+    if not match:
+        raise ValueError("'window' must look like 3600, 90s, 30m, 24h or 7d")
+    return int(match.group(1)) * _WINDOW_UNITS[match.group(2) or "s"]
+
+def _sync_fleet(tracker):
+    sims = list(simulated_servers) + list(_sim_map.values())
+    for sim in sims:
+        tracker.ensure(sim.key, sim.state, sim.state_since)
+    tracker.retain(sim.key for sim in sims)
+
+@analytics_bp.route("/availability", methods=["GET"])
+def availability_endpoint():
+    try:
+        window = parse_window(request.args.get("window", "24h"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not 0 < window <= availability.retention:
+        return jsonify({"error": f"'window' must be between 1s and {availability.retention}s"}), 400
+
+    ttl = current_app.config["ANALYTICS_CACHE_TTL"]
+    now = time.time()
+    # Windows covering the same buckets share an entry, so there are at most retention / bucket keys
+    key = availability.window_buckets(window)
+    with _report_lock:
+        cached = _report_cache.get(key)
+        if cached is None or cached[0] <= now:
+            for stale in [k for k, (expires, _) in _report_cache.items() if expires <= now]:
+                del _report_cache[stale]
+            _sync_fleet(availability)
+            report = availability_report(availability, window, now)
+            report["generated_at"] = now
+            cached = (now + ttl, report)
+            if ttl > 0:
+                _report_cache[key] = cached
+
+    response = jsonify(cached[1])
+    response.cache_control.max_age = max(0, int(cached[0] - now))
+    return response
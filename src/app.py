@@ -1,14 +1,32 @@
 from flask import Flask, Response, jsonify, request
-from prometheus_client import Counter, Gauge, Histogram, generate_latest
-from db import db, Server
-from servers import get_all_servers, servers_bp, get_simulated_metrics_for_db_servers, simulated_servers
+from prometheus_client import generate_latest
+from db import BACKGROUND_BIND, LifecycleEvent, RequestLog, bound_to, db, observe_pool_usage, server_status_counts
+from servers import (
+    SIM_FIELDS, TOP_K_LIMIT, TOP_METRICS, current_snapshot, on_transition, servers_bp,
+    get_simulated_metrics_for_db_servers, step_simulation
+)
+from serialization import configure_json, rows_requested, rows_response, stream_mode, stream_response
+from debug import debug_bp
+from events import events_bp, lifecycle_events
+from analytics import analytics_bp, availability
 import logging
 import time
 from sqlalchemy import text
 from logger import logger
 from config import Config, TestConfig
+from metrics import (
+    STATE_VALUES, request_latency, requests_by_endpoint, requests_total,
+    server_cpu, server_memory, server_state, servers_by_status
+)
+from migrations import upgrade
+from batch_writer import BatchWriter
+from sql_stats import begin_scope, end_scope, sql_scope
+from cache import inventory_cache, start_invalidation_listener
+from compression import init_compression
+from etag import make_etag, not_modified, with_etag
 import threading
 import os
+from datetime import datetime, timezone
 from werkzeug.exceptions import NotFound
 
 # -----------------------------
@@ -21,27 +39,59 @@ if os.getenv("FLASK_ENV") == "testing":
 else:
     app.config.from_object(Config)
 
+configure_json(app)
 db.init_app(app)
 app.register_blueprint(servers_bp, url_prefix="/servers")
+app.register_blueprint(debug_bp, url_prefix="/debug")
+app.register_blueprint(events_bp, url_prefix="/events")
+app.register_blueprint(analytics_bp, url_prefix="/analytics")
+lifecycle_events.configure(app.config["EVENTS_BUFFER_SIZE"])
+
+# -----------------------------
+# INVENTORY CACHE
+# -----------------------------
+inventory_cache.configure(app.config["INVENTORY_CACHE_SIZE"], app.config["INVENTORY_CACHE_TTL"])
+with app.app_context():
+    start_invalidation_listener(db.engine, app.config["CACHE_INVALIDATION_CHANNEL"])
 
 # -----------------------------
-# LOGGING
+# REQUEST LOG
 # -----------------------------
-logging.basicConfig(
-    filename="app.log",
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s: %(message)s"
+request_log_writer = BatchWriter(
+    app, RequestLog.__table__, "requests_log",
+    max_queue=app.config["REQUEST_LOG_QUEUE_SIZE"],
+    batch_size=app.config["REQUEST_LOG_BATCH_SIZE"],
+    flush_interval=app.config["REQUEST_LOG_FLUSH_MS"] / 1000,
 )
+if app.config["REQUEST_LOG_ENABLED"]:
+    request_log_writer.start()
 
 # -----------------------------
-# PROMETHEUS METRICS
+# LIFECYCLE EVENTS
 # -----------------------------
-requests_total = Counter('requests_total', 'Total number of requests')
-requests_by_endpoint = Counter('requests_by_endpoint', 'HTTP requests by endpoint and method', ['endpoint', 'method'])
-request_latency = Histogram('http_request_latency_seconds', 'HTTP request latency in seconds', ['endpoint'])
-server_cpu = Gauge('server_cpu_usage', 'CPU usage percentage', ['server_id'])
-server_memory = Gauge('server_memory_usage', 'Memory usage MB', ['server_id'])
-server_state = Gauge('server_state', 'Server state (0=FAILED,1=RUNNING,2=BOOTING)', ['server_id'])
+lifecycle_event_writer = BatchWriter(
+    app, LifecycleEvent.__table__, "lifecycle_events",
+    max_queue=app.config["LIFECYCLE_EVENTS_QUEUE_SIZE"],
+    batch_size=app.config["LIFECYCLE_EVENTS_BATCH_SIZE"],
+    flush_interval=app.config["LIFECYCLE_EVENTS_FLUSH_MS"] / 1000,
+)
+if app.config["LIFECYCLE_EVENTS_ENABLED"]:
+    lifecycle_event_writer.start()
+
+availability.configure(app.config["ANALYTICS_RETENTION_SECONDS"], app.config["ANALYTICS_BUCKET_SECONDS"])
+on_transition(availability.record)
+
+@on_transition
+def record_transition(event):
+    if app.config["LIFECYCLE_EVENTS_ENABLED"]:
+        server_id, timestamp, from_state, to_state, duration = event
+        lifecycle_event_writer.submit({
+            "server_id": server_id,
+            "timestamp": datetime.fromtimestamp(timestamp, timezone.utc),
+            "from_state": from_state,
+            "to_state": to_state,
+            "duration_s": duration,
+        })
 
 # -----------------------------
 # REQUEST TIMING
@@ -49,6 +99,8 @@ server_state = Gauge('server_state', 'Server state (0=FAILED,1=RUNNING,2=BOOTING
 @app.before_request
 def before_req():
     request._start_time = time.time()
+    rule = request.url_rule.rule if request.url_rule else "unmatched"
+    request._sql_scope = begin_scope(f"{request.method} {rule}")
 
 @app.after_request
 def after_req(response):
@@ -56,26 +108,40 @@ def after_req(response):
         endpoint = request.path
         method = request.method
         elapsed = time.time() - getattr(request, "_start_time", time.time())
+        if hasattr(request, "_sql_scope"):
+            end_scope(*request._sql_scope, budget=app.config["SQL_STATEMENT_BUDGET"])
         requests_total.inc()
         requests_by_endpoint.labels(endpoint=endpoint, method=method).inc()
         if endpoint != "/metrics":
             request_latency.labels(endpoint=endpoint).observe(elapsed)
+        if app.config["REQUEST_LOG_ENABLED"]:
+            request_log_writer.submit({
+                "timestamp": datetime.now(timezone.utc),
+                "method": method,
+                "path": endpoint[:255],
+                "status_code": response.status_code,
+                "latency_ms": elapsed * 1000,
+            })
     except Exception as e:
         logging.error(f"Metrics instrumentation error: {e}")
     return response
 
+# Registered after the timing hook so it runs first and compression time is included in the latency
+init_compression(app)
+
 # -----------------------------
 # BACKGROUND SCHEDULER
 # -----------------------------
 def background_server_updates(interval=5):
     while True:
-        with app.app_context():
-            for srv in simulated_servers:
-                srv.update()
+        with app.app_context(), bound_to(BACKGROUND_BIND), \
+                sql_scope("background_tick", app.config["SQL_STATEMENT_BUDGET"]):
+            step_simulation()
         time.sleep(interval)
 
-thread = threading.Thread(target=background_server_updates, daemon=True)
-thread.start()
+thread = threading.Thread(target=background_server_updates, name="background_server_updates", daemon=True)
+if app.config["SIMULATOR_ENABLED"]:
+    thread.start()
 
 # -----------------------------
 # ERROR HANDLERS
@@ -107,8 +173,19 @@ def home():
 @app.route("/simulated-servers")
 def simulated_servers_endpoint():
     logging.info("Simulated servers endpoint called")
-    servers = get_all_servers()
-    return jsonify(servers)
+    snapshot = current_snapshot()
+    mode = stream_mode()
+    if mode:
+        return stream_response(snapshot.dicts(), mode)
+    etag = make_etag("simulated", snapshot.generation)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    if rows_requested():
+        response = rows_response(SIM_FIELDS, snapshot.rows)
+    else:
+        response = jsonify(snapshot.dicts())
+    return with_etag(response, etag)
 
 @app.route("/health")
 def health():
@@ -123,16 +200,18 @@ def health():
 @app.route("/metrics")
 def metrics():
     try:
-        db_count = Server.query.count()
+        counts = server_status_counts()
     except Exception:
-        db_count = 0
+        counts = {}
+    for status, total in counts.items():
+        servers_by_status.labels(status=status).set(total)
+    db_count = sum(counts.values())
 
     if db_count > 0:
         servers_metrics = get_simulated_metrics_for_db_servers()
     else:
-        servers_metrics = get_all_servers()
+        servers_metrics = current_snapshot().dicts()
 
-    state_map = {"FAILED": 0, "RUNNING": 1, "BOOTING": 2}
     for srv in servers_metrics:
         sid = str(srv.get("id", "unknown"))
         cpu = float(srv.get("cpu_usage", 0))
@@ -140,21 +219,66 @@ def metrics():
         state = srv.get("state", "FAILED")
         server_cpu.labels(server_id=sid).set(cpu)
         server_memory.labels(server_id=sid).set(mem)
-        server_state.labels(server_id=sid).set(state_map.get(state, 0))
+        server_state.labels(server_id=sid).set(STATE_VALUES.get(state, 0))
 
+    observe_pool_usage()
+    inventory_cache.observe()
     logger.info("Metrics scraped for %d servers", len(servers_metrics))
     return Response(generate_latest(), mimetype="text/plain")
 
 @app.route("/lifecycle")
 def lifecycle():
-    servers = get_all_servers()
-    lifecycle_info = [{"id": srv["id"], "state": srv["state"]} for srv in servers]
-    return jsonify(lifecycle_info)
+    snapshot = current_snapshot()
+    etag = make_etag("lifecycle", snapshot.generation)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    lifecycle_info = [{"id": row[0], "state": row[1]} for row in snapshot.rows]
+    return with_etag(jsonify(lifecycle_info), etag)
+
+@app.route("/fleet/top")
+def fleet_top():
+    metric = request.args.get("metric", "cpu")
+    k = request.args.get("k", 20, type=int)
+    if metric not in TOP_METRICS:
+        return jsonify({"error": f"'metric' must be one of {', '.join(TOP_METRICS)}"}), 400
+    if k is None or not 1 <= k <= TOP_K_LIMIT:
+        return jsonify({"error": f"'k' must be an integer between 1 and {TOP_K_LIMIT}"}), 400
+
+    snapshot = current_snapshot()
+    # Ranking by time since failure does not change between ticks, only the values grow
+    offset = time.time() - snapshot.taken_at if metric == "time_since_failure" else 0
+    return jsonify({
+        "metric": metric,
+        "generation": snapshot.generation,
+        "servers": [
+            {"id": sid, "state": state, "value": value + offset}
+            for sid, state, value in snapshot.top[metric][:k]
+        ],
+    })
+
+@app.route("/simulation/step", methods=["POST"])
+def simulation_step():
+    data = request.get_json(silent=True) or {}
+    steps = data.get("steps", 1)
+    if not isinstance(steps, int) or not 1 <= steps <= app.config["SIMULATION_MAX_STEPS"]:
+        return jsonify({"error": f"'steps' must be an integer between 1 and {app.config['SIMULATION_MAX_STEPS']}"}), 400
+    try:
+        for _ in range(steps):
+            snapshot = step_simulation()
+    except Exception as e:
+        logger.error("Simulation step failed: %s", e)
+        return jsonify({"error": "Failed to advance simulation"}), 500
+    return jsonify({"generation": snapshot.generation, "servers": len(snapshot.rows)})
 
 # -----------------------------
 # MAIN
 # -----------------------------
+@app.cli.command("upgrade-db")
+def upgrade_db():
+    upgrade(db.engine)
+
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()
+        upgrade(db.engine)
     app.run(host="0.0.0.0", port=5000, debug=True)
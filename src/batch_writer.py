@@ -0,0 +1,74 @@
+import queue
+import threading
+import time
+from sqlalchemy import insert
+from db import BACKGROUND_BIND, bound_to, db
+from logger import logger
+from metrics import batch_writer_dropped, batch_writer_failed, batch_writer_queue_depth, batch_writer_written
+
+class BatchWriter:
+    # Buffers rows in a bounded in-memory queue and inserts them in batches
+    # from a background thread. submit() never blocks: when the queue is full
+    # the row is dropped and counted instead.
+
+    def __init__(self, app, table, name, max_queue=10000, batch_size=500, flush_interval=0.2):
+        self.app = app
+        self.table = table
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._write_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f"batch_writer:{self.name}", daemon=True)
+            self._thread.start()
+
+    def submit(self, row):
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            batch_writer_dropped.labels(writer=self.name).inc()
+            return False
+
+    def flush(self):
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _drain(self, block=True):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        batch_writer_queue_depth.labels(writer=self.name).set(self._queue.qsize())
+        return batch
+
+    def _write(self, rows):
+        with self._write_lock, self.app.app_context(), bound_to(BACKGROUND_BIND):
+            try:
+                db.session.execute(insert(self.table), rows)
+                db.session.commit()
+                batch_writer_written.labels(writer=self.name).inc(len(rows))
+            except Exception as e:
+                db.session.rollback()
+                batch_writer_failed.labels(writer=self.name).inc(len(rows))
+                logger.error("Batch writer %s failed to insert %d rows: %s", self.name, len(rows), e)
+
+    def _run(self):
+        while True:
+            batch = self._drain()
+            if batch:
+                self._write(batch)
@@ -0,0 +1,130 @@
+import select
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import text
+from etag import inventory_generation
+from logger import logger
+from metrics import (
+    inventory_cache_evictions, inventory_cache_hit_ratio, inventory_cache_hits, inventory_cache_misses,
+    inventory_cache_size
+)
+
+# -----------------------------
+# INVENTORY CACHE
+# -----------------------------
+class InventoryCache:
+    # LRU cache of server inventory rows with a TTL. Entries are dropped on
+    # writes through the blueprint; the TTL bounds staleness from writes made
+    # elsewhere (the simulator persisting status, other workers).
+
+    def __init__(self, maxsize=10000, ttl=5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, maxsize, ttl):
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self._data.clear()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                inventory_cache_hits.inc()
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+                inventory_cache_evictions.labels(reason="expired").inc()
+            self.misses += 1
+            inventory_cache_misses.inc()
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                inventory_cache_evictions.labels(reason="capacity").inc()
+
+    def invalidate(self, keys=None):
+        inventory_generation.bump()
+        with self._lock:
+            if keys is None:
+                dropped = len(self._data)
+                self._data.clear()
+            else:
+                dropped = sum(self._data.pop(k, None) is not None for k in keys)
+        if dropped:
+            inventory_cache_evictions.labels(reason="invalidated").inc(dropped)
+
+    def observe(self):
+        lookups = self.hits + self.misses
+        inventory_cache_size.set(len(self._data))
+        inventory_cache_hit_ratio.set(self.hits / lookups if lookups else 0)
+
+inventory_cache = InventoryCache()
+
+# -----------------------------
+# CROSS-WORKER INVALIDATION
+# -----------------------------
+# On PostgreSQL every invalidation is also published with NOTIFY so other
+# workers sharing the database drop the same rows. Payload: comma-separated
+# ids, or "*" to clear everything.
+
+def publish_invalidation(session, channel, server_ids):
+    if not channel or session.get_bind().dialect.name != "postgresql":
+        return
+    payload = ",".join(str(i) for i in server_ids) if server_ids is not None else "*"
+    try:
+        session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload[:7999]})
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error("Failed to publish cache invalidation: %s", e)
+
+def _apply_notification(cache, payload):
+    if payload == "*" or len(payload) >= 7999:
+        cache.invalidate()
+    else:
+        cache.invalidate(int(i) for i in payload.split(",") if i)
+
+def _listen(engine, channel, cache):
+    while True:
+        try:
+            cargs, cparams = engine.dialect.create_connect_args(engine.url)
+            conn = engine.dialect.loaded_dbapi.connect(*cargs, **cparams)
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN "{channel}"')
+            # Anything may have changed while we were not listening
+            cache.invalidate()
+            while True:
+                if select.select([conn], [], [], 30) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    _apply_notification(cache, conn.notifies.pop(0).payload)
+        except Exception as e:
+            logger.error("Cache invalidation listener error: %s", e)
+            time.sleep(5)
+
+def start_invalidation_listener(engine, channel, cache=inventory_cache):
+    if not channel or engine.dialect.name != "postgresql":
+        return None
+    listener = threading.Thread(
+        target=_listen, args=(engine, channel, cache), name="cache_invalidation_listener", daemon=True
+    )
+    listener.start()
+    return listener
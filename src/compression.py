@@ -0,0 +1,69 @@
+import zlib
+from flask import request
+from metrics import response_bytes_compressed, response_bytes_uncompressed
+
+# -----------------------------
+# RESPONSE COMPRESSION
+# -----------------------------
+# gzip is preferred over deflate when a client accepts both. "deflate" is the
+# zlib-wrapped format HTTP expects, not raw deflate.
+ENCODINGS = ("gzip", "deflate")
+_WBITS = {"gzip": 31, "deflate": 15}
+
+def _negotiate():
+    accepted = request.accept_encodings
+    for encoding in ENCODINGS:
+        if accepted[encoding] > 0:
+            return encoding
+    return None
+
+def _compressible(response, config):
+    if not 200 <= response.status_code < 300 or response.status_code == 204:
+        return False
+    if "Content-Encoding" in response.headers or response.direct_passthrough:
+        return False
+    return response.mimetype in config["COMPRESSION_MIMETYPES"]
+
+def _compress_stream(chunks, compressor, encoding):
+    # Sync-flush after every chunk so streamed rows reach the client as they are produced
+    for chunk in chunks:
+        response_bytes_uncompressed.labels(encoding=encoding).inc(len(chunk))
+        out = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        response_bytes_compressed.labels(encoding=encoding).inc(len(out))
+        yield out
+    out = compressor.flush()
+    response_bytes_compressed.labels(encoding=encoding).inc(len(out))
+    yield out
+
+def compress_response(response, config):
+    if not config["COMPRESSION_ENABLED"] or not _compressible(response, config):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = _negotiate()
+    if encoding is None:
+        return response
+
+    compressor = zlib.compressobj(config["COMPRESSION_LEVEL"], zlib.DEFLATED, _WBITS[encoding])
+    if response.is_streamed:
+        response.response = _compress_stream(response.iter_encoded(), compressor, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config["COMPRESSION_MIN_SIZE"]:
+            return response
+        compressed = compressor.compress(data) + compressor.flush()
+        response_bytes_uncompressed.labels(encoding=encoding).inc(len(data))
+        response_bytes_compressed.labels(encoding=encoding).inc(len(compressed))
+        response.set_data(compressed)
+
+    response.headers["Content-Encoding"] = encoding
+    # A compressed body is a different representation, so it needs its own ETag
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+def init_compression(app):
+    @app.after_request
+    def _compress(response):
+        return compress_response(response, app.config)
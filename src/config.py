@@ -1,5 +1,15 @@
+import json
 import os
 
+def _bind(uri, engine_options, **overrides):
+    if uri.startswith("sqlite"):
+        # Local/offline database: pool and connect options are PostgreSQL specific
+        return {"url": uri}
+    return dict(engine_options, url=uri, **overrides)
+
+def _replica_binds(keys, uris, engine_options):
+    return {key: _bind(uri, engine_options) for key, uri in zip(keys, uris)}
+
 class Config:
     DB_HOST = os.environ.get("DB_HOST", "localhost")
     DB_PORT = os.environ.get("DB_PORT", 5432)
@@ -7,11 +17,113 @@ class Config:
     DB_USER = os.environ.get("DB_USER", "monitor")
     DB_PASSWORD = os.environ.get("DB_PASSWORD", "monitor123")
 
-    SQLALCHEMY_DATABASE_URI = (
+    # DATABASE_URL overrides the DB_* settings, e.g. sqlite:///local.db for offline runs
+    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") or (
         f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 10))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 30000))
+    DB_BACKGROUND_POOL_SIZE = int(os.environ.get("DB_BACKGROUND_POOL_SIZE", 2))
+
+    SQLALCHEMY_ENGINE_OPTIONS = {} if SQLALCHEMY_DATABASE_URI.startswith("sqlite") else {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if SQLALCHEMY_DATABASE_URI.startswith("postgresql"):
+        SQLALCHEMY_ENGINE_OPTIONS["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    SQLALCHEMY_ENGINE_OPTIONS.update(json.loads(os.environ.get("SQLALCHEMY_ENGINE_OPTIONS", "{}")))
+
+    # The simulator and other background writers get their own pool so a
+    # flushing tick cannot starve request handlers of connections.
+    SQLALCHEMY_BINDS = {
+        "background": _bind(
+            SQLALCHEMY_DATABASE_URI, SQLALCHEMY_ENGINE_OPTIONS,
+            pool_size=DB_BACKGROUND_POOL_SIZE, max_overflow=0,
+        ),
+    }
+
+    # Optional comma-separated read replica URIs; GET endpoints marked with
+    # db.replica_reads use them except right after a write from this process.
+    DB_REPLICA_URIS = [u.strip() for u in os.environ.get("DB_REPLICA_URIS", "").split(",") if u.strip()]
+    REPLICA_BIND_KEYS = [f"replica_{i}" for i in range(len(DB_REPLICA_URIS))]
+    REPLICA_READ_AFTER_WRITE_SECONDS = float(os.environ.get("REPLICA_READ_AFTER_WRITE_SECONDS", 5))
+    SQLALCHEMY_BINDS.update(_replica_binds(REPLICA_BIND_KEYS, DB_REPLICA_URIS, SQLALCHEMY_ENGINE_OPTIONS))
+
+    REQUEST_LOG_ENABLED = os.environ.get("REQUEST_LOG_ENABLED", "true").lower() == "true"
+    REQUEST_LOG_QUEUE_SIZE = int(os.environ.get("REQUEST_LOG_QUEUE_SIZE", 10000))
+    REQUEST_LOG_BATCH_SIZE = int(os.environ.get("REQUEST_LOG_BATCH_SIZE", 500))
+    REQUEST_LOG_FLUSH_MS = int(os.environ.get("REQUEST_LOG_FLUSH_MS", 200))
+
+    # State transitions of simulated servers, written in batches to lifecycle_events
+    LIFECYCLE_EVENTS_ENABLED = os.environ.get("LIFECYCLE_EVENTS_ENABLED", "true").lower() == "true"
+    LIFECYCLE_EVENTS_QUEUE_SIZE = int(os.environ.get("LIFECYCLE_EVENTS_QUEUE_SIZE", 10000))
+    LIFECYCLE_EVENTS_BATCH_SIZE = int(os.environ.get("LIFECYCLE_EVENTS_BATCH_SIZE", 500))
+    LIFECYCLE_EVENTS_FLUSH_MS = int(os.environ.get("LIFECYCLE_EVENTS_FLUSH_MS", 1000))
+
+    # /analytics/availability: longest queryable window and per-window result cache
+    ANALYTICS_RETENTION_SECONDS = int(os.environ.get("ANALYTICS_RETENTION_SECONDS", 7 * 86400))
+    # Availability is kept per server in buckets of this size; windows are rounded up to whole buckets
+    ANALYTICS_BUCKET_SECONDS = int(os.environ.get("ANALYTICS_BUCKET_SECONDS", 3600))
+    ANALYTICS_CACHE_TTL = float(os.environ.get("ANALYTICS_CACHE_TTL", 30))
+
+    # Requests or ticks issuing more statements than this log a warning (0 disables)
+    SQL_STATEMENT_BUDGET = int(os.environ.get("SQL_STATEMENT_BUDGET", 50))
+
+    # /debug endpoints are off unless enabled; set DEBUG_TOKEN to require X-Debug-Token
+    DEBUG_ENDPOINTS_ENABLED = os.environ.get("DEBUG_ENDPOINTS_ENABLED", "false").lower() == "true"
+    DEBUG_TOKEN = os.environ.get("DEBUG_TOKEN")
+    DEBUG_PROFILE_MAX_SECONDS = int(os.environ.get("DEBUG_PROFILE_MAX_SECONDS", 60))
+
+    SIMULATOR_ENABLED = os.environ.get("SIMULATOR_ENABLED", "true").lower() == "true"
+    # Upper bound for POST /simulation/step {"steps": n}
+    SIMULATION_MAX_STEPS = int(os.environ.get("SIMULATION_MAX_STEPS", 100))
+
+    INVENTORY_CACHE_SIZE = int(os.environ.get("INVENTORY_CACHE_SIZE", 10000))
+    INVENTORY_CACHE_TTL = float(os.environ.get("INVENTORY_CACHE_TTL", 5))
+    # PostgreSQL NOTIFY channel used to invalidate the cache across workers ("" disables)
+    CACHE_INVALIDATION_CHANNEL = os.environ.get("CACHE_INVALIDATION_CHANNEL", "server_inventory")
+
+    # Cache-Control max-age for ETag'd listings; 0 sends no-cache (always revalidate)
+    ETAG_MAX_AGE = int(os.environ.get("ETAG_MAX_AGE", 0))
+
+    # "auto" uses orjson when installed, "stdlib" forces Flask's default encoder
+    JSON_PROVIDER = os.environ.get("JSON_PROVIDER", "auto")
+
+    # gzip/deflate for JSON, NDJSON and /metrics bodies of at least COMPRESSION_MIN_SIZE bytes
+    # (streamed responses are always compressed when the client accepts it)
+    COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+    COMPRESSION_LEVEL = int(os.environ.get("COMPRESSION_LEVEL", 6))
+    COMPRESSION_MIMETYPES = os.environ.get(
+        "COMPRESSION_MIMETYPES", "application/json,application/x-ndjson,text/plain"
+    ).split(",")
+
+    # GET /events/lifecycle: shared ring of past events, per-client lag limit before a reset
+    EVENTS_BUFFER_SIZE = int(os.environ.get("EVENTS_BUFFER_SIZE", 1000))
+    EVENTS_CLIENT_BACKLOG = int(os.environ.get("EVENTS_CLIENT_BACKLOG", 100))
+    EVENTS_MAX_SUBSCRIBERS = int(os.environ.get("EVENTS_MAX_SUBSCRIBERS", 100))
+    EVENTS_HEARTBEAT_SECONDS = float(os.environ.get("EVENTS_HEARTBEAT_SECONDS", 15))
+
+    BULK_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", 1000))
+    SERVERS_MAX_PAGE_SIZE = int(os.environ.get("SERVERS_MAX_PAGE_SIZE", 1000))
+    STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", 1000))
+
 class TestConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SQLALCHEMY_BINDS = {}
+    REPLICA_BIND_KEYS = []
+    REQUEST_LOG_ENABLED = False
+    LIFECYCLE_EVENTS_ENABLED = False
+    ANALYTICS_CACHE_TTL = 0
+    DEBUG_ENDPOINTS_ENABLED = True
@@ -1,8 +1,131 @@
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from flask import current_app, g, has_app_context, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.pool import QueuePool
+from metrics import db_pool_checked_out, db_pool_overflow, db_pool_size, db_pool_wait_seconds
 
-db = SQLAlchemy()
+BACKGROUND_BIND = "background"
+
+# -----------------------------
+# CONNECTION POOLS
+# -----------------------------
+class InstrumentedQueuePool(QueuePool):
+    label = "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait_seconds.labels(pool=self.label).observe(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.label = self.label
+        return pool
+
+_current_bind = ContextVar("current_bind", default=None)
+
+@contextmanager
+def bound_to(bind_key):
+    # Routes db.session to another engine (e.g. the background pool) in this context
+    token = _current_bind.set(bind_key)
+    try:
+        yield
+    finally:
+        _current_bind.reset(token)
+
+# -----------------------------
+# READ REPLICAS
+# -----------------------------
+_last_request_write = 0.0
+_replica_cycle = itertools.count()
+_READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+def replica_reads(view):
+    # Lets reads issued while serving this view go to a replica. Stored on g so
+    # streamed responses keep the routing after the view function returns.
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.replica_reads = True
+        return view(*args, **kwargs)
+    return wrapper
+
+def _mark_request_write():
+    # Only inventory mutations open the read-your-writes window; writes made
+    # while serving a GET (simulator state) or on another bind do not.
+    global _last_request_write
+    if _current_bind.get() is None and has_request_context() and request.method not in _READ_METHODS:
+        _last_request_write = time.monotonic()
+
+def _replica_engine(engines):
+    if not (has_app_context() and g.get("replica_reads")):
+        return None
+    keys = current_app.config.get("REPLICA_BIND_KEYS", ())
+    if not keys:
+        return None
+    window = current_app.config.get("REPLICA_READ_AFTER_WRITE_SECONDS", 5)
+    if time.monotonic() - _last_request_write < window:
+        return None
+    return engines[keys[next(_replica_cycle) % len(keys)]]
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            engines = self._db.engines
+            bind_key = _current_bind.get()
+            if bind_key is not None and bind_key in engines:
+                return engines[bind_key]
+            if not self._flushing and not isinstance(clause, UpdateBase):
+                replica = _replica_engine(engines)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context):
+    _mark_request_write()
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _on_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_request_write()
+
+class MonitorSQLAlchemy(SQLAlchemy):
+    def _make_engine(self, bind_key, options, app):
+        if not str(options["url"]).startswith("sqlite"):
+            options.setdefault("poolclass", InstrumentedQueuePool)
+        engine = super()._make_engine(bind_key, options, app)
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            engine.pool.label = bind_key or "default"
+        return engine
+
+db = MonitorSQLAlchemy(session_options={"class_": RoutingSession})
+
+def observe_pool_usage():
+    for bind_key, engine in db.engines.items():
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        label = bind_key or "default"
+        db_pool_size.labels(pool=label).set(pool.size())
+        db_pool_checked_out.labels(pool=label).set(pool.checkedout())
+        db_pool_overflow.labels(pool=label).set(max(pool.overflow(), 0))
 
 class Server(db.Model):
+    __table_args__ = (
+        db.Index("ix_server_status_id", "status", "id"),
+        db.Index("ux_server_hostname", "hostname", unique=True),
+        db.Index("ix_server_ip_address", "ip_address"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     hostname = db.Column(db.String(64), nullable=False)
     ip_address = db.Column(db.String(64), nullable=False)
@@ -10,3 +133,114 @@ class Server(db.Model):
     cpu_usage = db.Column(db.Float, default=0.0)
     memory_usage = db.Column(db.Integer, default=0)
     uptime = db.Column(db.Integer, default=0)
+
+class ServerStatusCount(db.Model):
+    __tablename__ = "server_status_counts"
+
+    status = db.Column(db.String(20), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+class RequestLog(db.Model):
+    __tablename__ = "requests_log"
+
+    id = db.Column(db.Integer, primary_key=True)
+    timestamp = db.Column(db.DateTime(timezone=True), nullable=False)
+    method = db.Column(db.String(10), nullable=False)
+    path = db.Column(db.String(255), nullable=False)
+    status_code = db.Column(db.Integer, nullable=False)
+    latency_ms = db.Column(db.Float, nullable=False)
+
+class LifecycleEvent(db.Model):
+    __tablename__ = "lifecycle_events"
+    __table_args__ = (
+        db.Index("ix_lifecycle_events_timestamp", "timestamp"),
+        db.Index("ix_lifecycle_events_server_timestamp", "server_id", "timestamp"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    server_id = db.Column(db.String(64), nullable=False)
+    timestamp = db.Column(db.DateTime(timezone=True), nullable=False)
+    from_state = db.Column(db.String(20), nullable=False)
+    to_state = db.Column(db.String(20), nullable=False)
+    duration_s = db.Column(db.Float, nullable=False)
+
+# -----------------------------
+# STATUS COUNT TRIGGERS
+# -----------------------------
+# server_status_counts is kept in sync by the database itself so that bulk
+# set-based statements and the simulator writes are both covered.
+_SQLITE_STATUS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS server_status_count_insert AFTER INSERT ON server
+    BEGIN
+        INSERT INTO server_status_counts (status, total) VALUES (COALESCE(NEW.status, 'UNKNOWN'), 1)
+        ON CONFLICT (status) DO UPDATE SET total = total + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS server_status_count_update AFTER UPDATE OF status ON server
+    WHEN OLD.status IS NOT NEW.status
+    BEGIN
+        UPDATE server_status_counts SET total = total - 1 WHERE status = COALESCE(OLD.status, 'UNKNOWN');
+        INSERT INTO server_status_counts (status, total) VALUES (COALESCE(NEW.status, 'UNKNOWN'), 1)
+        ON CONFLICT (status) DO UPDATE SET total = total + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS server_status_count_delete AFTER DELETE ON server
+    BEGIN
+        UPDATE server_status_counts SET total = total - 1 WHERE status = COALESCE(OLD.status, 'UNKNOWN');
+    END
+    """,
+]
+
+_POSTGRES_STATUS_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION server_status_count_sync() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' AND OLD.status IS NOT DISTINCT FROM NEW.status THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE server_status_counts SET total = total - 1 WHERE status = COALESCE(OLD.status, 'UNKNOWN');
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO server_status_counts (status, total) VALUES (COALESCE(NEW.status, 'UNKNOWN'), 1)
+            ON CONFLICT (status) DO UPDATE SET total = server_status_counts.total + 1;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS server_status_count_sync ON server",
+    """
+    CREATE TRIGGER server_status_count_sync AFTER INSERT OR DELETE OR UPDATE OF status ON server
+    FOR EACH ROW EXECUTE FUNCTION server_status_count_sync()
+    """,
+]
+
+def install_status_count_triggers(connection):
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        statements = _POSTGRES_STATUS_TRIGGERS
+    elif dialect == "sqlite":
+        statements = _SQLITE_STATUS_TRIGGERS
+    else:
+        return
+    for statement in statements:
+        connection.execute(text(statement))
+
+def rebuild_status_counts(connection):
+    connection.execute(text("DELETE FROM server_status_counts"))
+    connection.execute(text(
+        "INSERT INTO server_status_counts (status, total) "
+        "SELECT COALESCE(status, 'UNKNOWN'), COUNT(*) FROM server GROUP BY COALESCE(status, 'UNKNOWN')"
+    ))
+
+@event.listens_for(db.metadata, "after_create")
+def _after_create(target, connection, **kw):
+    install_status_count_triggers(connection)
+
+def server_status_counts():
+    rows = db.session.execute(db.select(ServerStatusCount.status, ServerStatusCount.total))
+    return {status: total for status, total in rows}
@@ -0,0 +1,121 @@
+import tracemalloc
+from collections import Counter
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from prometheus_client import REGISTRY
+from sqlalchemy.orm.session import _sessions
+from profiler import collapsed_stacks, profile
+from servers import _sim_map, simulated_servers
+
+_baseline_snapshot = None
+MAX_TRACE_FRAMES = 100
+MAX_TOP_STATS = 500
+
+# -----------------------------
+# Flask Blueprint
+# -----------------------------
+debug_bp = Blueprint("debug", __name__)
+
+@debug_bp.before_request
+def guard():
+    if not current_app.config.get("DEBUG_ENDPOINTS_ENABLED"):
+        abort(404)
+    token = current_app.config.get("DEBUG_TOKEN")
+    if token and request.headers.get("X-Debug-Token") != token:
+        return jsonify({"error": "Forbidden"}), 403
+
+@debug_bp.route("/profile", methods=["GET"])
+def profile_endpoint():
+    seconds = request.args.get("seconds", 5, type=float)
+    interval = request.args.get("interval", 0.005, type=float)
+    max_seconds = current_app.config.get("DEBUG_PROFILE_MAX_SECONDS", 60)
+    if not 0 < seconds <= max_seconds or not 0.001 <= interval <= 1:
+        return jsonify({"error": f"'seconds' must be in (0, {max_seconds}] and 'interval' in [0.001, 1]"}), 400
+
+    counts = profile(seconds, interval)
+    if counts is None:
+        return jsonify({"error": "A profile is already running"}), 409
+    return Response(collapsed_stacks(counts), mimetype="text/plain")
+
+# -----------------------------
+# MEMORY
+# -----------------------------
+def _metric_series():
+    series = Counter()
+    for family in REGISTRY.collect():
+        series[family.name] += len(family.samples)
+    return series
+
+def _identity_maps():
+    sizes = [len(session.identity_map) for session in list(_sessions.values())]
+    return {"sessions": len(sizes), "objects": sum(sizes), "largest": max(sizes, default=0)}
+
+def _int_arg(name, default, low, high):
+    value = request.args.get(name, default, type=int)
+    if not low <= value <= high:
+        raise ValueError(f"'{name}' must be in [{low}, {high}]")
+    return value
+
+def _top_stats(stats, limit):
+    return [
+        {
+            "site": str(stat.traceback),
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+            **({"size_diff_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff}
+               if hasattr(stat, "size_diff") else {}),
+        }
+        for stat in stats[:limit]
+    ]
+
+@debug_bp.route("/memory", methods=["GET"])
+def memory_report():
+    try:
+        limit = _int_arg("top", 20, 1, MAX_TOP_STATS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    series = _metric_series()
+    report = {
+        "simulated_servers": {"standalone": len(simulated_servers), "db_backed": len(_sim_map)},
+        "metric_series": {"total": sum(series.values()), "by_metric": dict(series.most_common(limit))},
+        "identity_maps": _identity_maps(),
+        "tracemalloc": {"tracing": tracemalloc.is_tracing(), "baseline": _baseline_snapshot is not None},
+    }
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        report["tracemalloc"].update({
+            "current_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "top": _top_stats(snapshot.statistics("lineno"), limit),
+        })
+    return jsonify(report)
+
+@debug_bp.route("/memory/<action>", methods=["POST"])
+def memory_action(action):
+    global _baseline_snapshot
+    try:
+        frames = _int_arg("frames", 1, 1, MAX_TRACE_FRAMES)
+        limit = _int_arg("top", 20, 1, MAX_TOP_STATS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if action == "start":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        return jsonify({"tracing": True})
+    if action == "stop":
+        tracemalloc.stop()
+        _baseline_snapshot = None
+        return jsonify({"tracing": False})
+
+    if not tracemalloc.is_tracing():
+        return jsonify({"error": "tracemalloc is not running; POST /debug/memory/start first"}), 409
+    if action == "snapshot":
+        _baseline_snapshot = tracemalloc.take_snapshot()
+        return jsonify({"baseline": True})
+    if action == "diff":
+        if _baseline_snapshot is None:
+            return jsonify({"error": "No baseline snapshot; POST /debug/memory/snapshot first"}), 409
+        stats = tracemalloc.take_snapshot().compare_to(_baseline_snapshot, "lineno")
+        return jsonify({"top": _top_stats(stats, limit)})
+    abort(404)
@@ -0,0 +1,57 @@
+import itertools
+import uuid
+import zlib
+from flask import current_app, request
+from compression import ENCODINGS
+
+# -----------------------------
+# GENERATION COUNTERS
+# -----------------------------
+# inventory_generation moves whenever the inventory cache is invalidated: on
+# every inventory write or persisted status change in this worker and on every
+# invalidation published by another worker or lifecycle_manager.
+# fleet_generation moves once per published fleet snapshot. ETags are built
+# from them, so a conditional GET is answered without touching the database or
+# serializing anything.
+
+class Generation:
+    def __init__(self):
+        self._counter = itertools.count(1)
+        self.value = 0
+
+    def bump(self):
+        self.value = next(self._counter)
+        return self.value
+
+inventory_generation = Generation()
+fleet_generation = Generation()
+
+# Distinguishes processes so a worker never answers 304 for another worker's ETag
+_EPOCH = uuid.uuid4().hex[:8]
+
+def make_etag(*parts):
+    variant = zlib.crc32(request.query_string + request.headers.get("Accept", "").encode())
+    return "-".join([_EPOCH, *(str(p) for p in parts), f"{variant:x}"])
+
+def _cache_headers(response, etag):
+    response.set_etag(etag)
+    max_age = current_app.config.get("ETAG_MAX_AGE", 0)
+    if max_age:
+        response.cache_control.max_age = max_age
+        response.cache_control.private = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+def not_modified(etag):
+    # Returns a 304 response if the client already has this representation,
+    # either identity-encoded or with a compression suffix
+    for candidate in (etag, *(f"{etag}-{encoding}" for encoding in ENCODINGS)):
+        if request.if_none_match.contains(candidate):
+            return _cache_headers(current_app.response_class(status=304), candidate)
+    return None
+
+def with_etag(response, etag):
+    if response.status_code == 200:
+        _cache_headers(response, etag)
+    return response
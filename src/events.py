@@ -0,0 +1,128 @@
+import itertools
+import json
+import threading
+import uuid
+from collections import deque
+from flask import Blueprint, Response, current_app, jsonify, request
+from metrics import event_client_resets, event_subscribers
+
+# -----------------------------
+# EVENT BROKER
+# -----------------------------
+# Every published event is serialized once into a shared ring buffer.
+# Subscribers only keep a cursor into it, so a tick is one append plus one
+# notify_all regardless of how many clients are connected. A client that falls
+# further behind than its backlog limit (or past the end of the ring) gets a
+# "reset" event and is moved to the newest events; it should resync from
+# /lifecycle.
+
+class EventBroker:
+    def __init__(self, name, buffer_size=1000):
+        self.name = name
+        self.epoch = uuid.uuid4().hex[:8]
+        self._events = deque(maxlen=buffer_size)
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self.last_id = 0
+        self.subscribers = 0
+
+    def configure(self, buffer_size):
+        with self._cond:
+            self._events = deque(self._events, maxlen=buffer_size)
+
+    def publish(self, event_type, payload):
+        data = json.dumps(payload, separators=(",", ":"))
+        with self._cond:
+            self.last_id = next(self._ids)
+            self._events.append((self.last_id, event_type, data))
+            self._cond.notify_all()
+        return self.last_id
+
+    def subscribe(self, limit):
+        with self._cond:
+            if self.subscribers >= limit:
+                return False
+            self.subscribers += 1
+        event_subscribers.labels(stream=self.name).inc()
+        return True
+
+    def unsubscribe(self):
+        with self._cond:
+            self.subscribers -= 1
+        event_subscribers.labels(stream=self.name).dec()
+
+    def format_id(self, event_id):
+        return f"{self.epoch}-{event_id}"
+
+    def parse_id(self, value):
+        # Returns the numeric cursor for a Last-Event-ID of this process, else None
+        epoch, _, number = (value or "").partition("-")
+        if epoch != self.epoch or not number.isdigit():
+            return None
+        return min(int(number), self.last_id)
+
+    def _since(self, after, backlog):
+        events = self._events
+        if not events or events[-1][0] <= after:
+            return [], False
+        start = after - events[0][0] + 1
+        lagged = start < 0 or len(events) - start > backlog
+        if lagged:
+            start = max(0, len(events) - backlog)
+        return list(itertools.islice(events, start, None)), lagged
+
+    def wait(self, after, backlog, timeout):
+        with self._cond:
+            if self.last_id <= after:
+                self._cond.wait(timeout)
+            return self._since(after, backlog)
+
+lifecycle_events = EventBroker("lifecycle")
+
+# -----------------------------
+# SSE ENDPOINTS
+# -----------------------------
+events_bp = Blueprint("events", __name__)
+
+def _sse(broker, cursor, reset, backlog, heartbeat):
+    yield "retry: 3000\n\n"
+    if reset:
+        event_client_resets.labels(stream=broker.name).inc()
+        yield "event: reset\ndata: {}\n\n"
+    while True:
+        events, lagged = broker.wait(cursor, backlog, heartbeat)
+        if lagged:
+            event_client_resets.labels(stream=broker.name).inc()
+            yield "event: reset\ndata: {}\n\n"
+        if not events:
+            yield ": keepalive\n\n"
+            continue
+        yield "".join(
+            f"id: {broker.format_id(event_id)}\nevent: {event_type}\ndata: {data}\n\n"
+            for event_id, event_type, data in events
+        )
+        cursor = events[-1][0]
+
+@events_bp.route("/lifecycle", methods=["GET"])
+def lifecycle_stream():
+    broker = lifecycle_events
+    config = current_app.config
+    if not broker.subscribe(config["EVENTS_MAX_SUBSCRIBERS"]):
+        return jsonify({"error": "Too many event stream subscribers"}), 503
+
+    last_event_id = request.headers.get("Last-Event-ID")
+    cursor = broker.parse_id(last_event_id) if last_event_id else broker.last_id
+    reset = cursor is None
+    if reset:
+        cursor = broker.last_id
+
+    response = Response(
+        _sse(broker, cursor, reset, config["EVENTS_CLIENT_BACKLOG"], config["EVENTS_HEARTBEAT_SECONDS"]),
+        mimetype="text/event-stream",
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    # Released when the server closes the response, even if the body was never
+    # iterated (HEAD requests, clients gone before the first chunk)
+    response.call_on_close(broker.unsubscribe)
+    return response
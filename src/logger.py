@@ -1,10 +1,142 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from metrics import log_records_dropped
 
-logger = logging.getLogger("infra_monitor")
-logger.setLevel(logging.INFO)
+LOG_FILE = os.environ.get("LOG_FILE", "app.log")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+# Per-logger suppression windows in seconds, e.g. "infra_monitor=60,root=30,werkzeug=0"
+LOG_RATE_LIMITS = os.environ.get("LOG_RATE_LIMITS", "infra_monitor=60,root=60")
+
+def _parse_rate_limits(spec):
+    limits = {}
+    for item in spec.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() and seconds.strip():
+            limits[name.strip()] = float(seconds)
+    return limits
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload)
+
+class NonBlockingQueueHandler(QueueHandler):
+    # Formatting is left to the listener thread; the caller only pays for the put
+    def prepare(self, record):
+        if record.exc_info:
+            return super().prepare(record)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc()
+
+class RateLimitFilter(logging.Filter):
+    # Lets the first occurrence of a message template through per window and
+    # counts the rest. The count is reported on the next occurrence after the
+    # window closes, or by a sweep if the message stops repeating.
+
+    SWEEP_INTERVAL = 5.0
+
+    def __init__(self, limits, handler=None):
+        super().__init__()
+        self.limits = limits
+        self.handler = handler
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    def _interval(self, name):
+        while True:
+            if name in self.limits:
+                return self.limits[name]
+            if "." not in name:
+                return 0
+            name = name.rsplit(".", 1)[0]
 
-handler = RotatingFileHandler("infra_monitor.log", maxBytes=5*1024*1024, backupCount=2)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-handler.setFormatter(formatter)
-logger.addHandler(handler)
+    def filter(self, record):
+        if getattr(record, "rate_limit_summary", False):
+            return True
+        interval = self._interval(record.name)
+        if interval <= 0:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        with self._lock:
+            window = self._windows.get(key)
+            if window is not None and record.created - window[0] < interval:
+                window[1] += 1
+                window[2] = record.args
+                allowed, suppressed = False, 0
+            else:
+                suppressed = window[1] if window is not None else 0
+                self._windows[key] = [record.created, 0, record.args]
+                allowed = True
+            expired = self._sweep(record.created)
+
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar messages suppressed in the last {interval:g}s]"
+        for summary in expired:
+            self.handler.handle(summary)
+        return allowed
+
+    def _sweep(self, now):
+        if self.handler is None or now - self._last_sweep < self.SWEEP_INTERVAL:
+            return []
+        self._last_sweep = now
+        summaries = []
+        for key, (start, suppressed, args) in list(self._windows.items()):
+            name, level, msg = key
+            interval = self._interval(name)
+            if now - start < interval:
+                continue
+            del self._windows[key]
+            if suppressed:
+                summary = logging.LogRecord(
+                    name, level, __file__, 0,
+                    f"{msg} [{suppressed} similar messages suppressed in the last {interval:g}s]", args, None
+                )
+                summary.rate_limit_summary = True
+                summaries.append(summary)
+        return summaries
+
+def setup_logging():
+    root = logging.getLogger()
+    if any(isinstance(h, NonBlockingQueueHandler) for h in root.handlers):
+        return
+
+    file_handler = RotatingFileHandler(LOG_FILE, maxBytes=5*1024*1024, backupCount=2)
+    if LOG_FORMAT == "json":
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(_parse_rate_limits(LOG_RATE_LIMITS), handler=queue_handler))
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+    listener.start()
+    atexit.register(listener.stop)
+
+setup_logging()
+
+logger = logging.getLogger("infra_monitor")
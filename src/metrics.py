@@ -0,0 +1,70 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# -----------------------------
+# PROMETHEUS METRICS
+# -----------------------------
+requests_total = Counter('requests_total', 'Total number of requests')
+requests_by_endpoint = Counter('requests_by_endpoint', 'HTTP requests by endpoint and method', ['endpoint', 'method'])
+request_latency = Histogram('http_request_latency_seconds', 'HTTP request latency in seconds', ['endpoint'])
+server_cpu = Gauge('server_cpu_usage', 'CPU usage percentage', ['server_id'])
+server_memory = Gauge('server_memory_usage', 'Memory usage MB', ['server_id'])
+server_state = Gauge('server_state', 'Server state (0=FAILED,1=RUNNING,2=BOOTING)', ['server_id'])
+servers_by_status = Gauge('servers_by_status', 'Registered servers per status', ['status'])
+db_pool_size = Gauge('db_pool_size', 'Configured connection pool size', ['pool'])
+db_pool_checked_out = Gauge('db_pool_checked_out', 'Connections currently checked out of the pool', ['pool'])
+db_pool_overflow = Gauge('db_pool_overflow', 'Overflow connections currently open beyond pool_size', ['pool'])
+db_pool_wait_seconds = Histogram(
+    'db_pool_wait_seconds', 'Time spent waiting to check out a pooled connection', ['pool'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+)
+batch_writer_written = Counter('batch_writer_rows_written_total', 'Rows inserted by batch writers', ['writer'])
+batch_writer_dropped = Counter('batch_writer_rows_dropped_total', 'Rows dropped on a full writer queue', ['writer'])
+batch_writer_failed = Counter('batch_writer_rows_failed_total', 'Rows lost to failed batch inserts', ['writer'])
+batch_writer_queue_depth = Gauge('batch_writer_queue_depth', 'Rows waiting in the batch writer queue', ['writer'])
+log_records_dropped = Counter('log_records_dropped_total', 'Log records dropped because the log queue was full')
+sql_statements_per_scope = Histogram(
+    'db_statements_per_scope', 'SQL statements issued per request route or background tick', ['scope'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 500, 1000, 5000, 10000)
+)
+sql_time_per_scope = Histogram(
+    'db_time_per_scope_seconds', 'Cumulative SQL execution time per request route or background tick', ['scope']
+)
+inventory_cache_hits = Counter('inventory_cache_hits_total', 'Server inventory cache hits')
+inventory_cache_misses = Counter('inventory_cache_misses_total', 'Server inventory cache misses')
+inventory_cache_evictions = Counter(
+    'inventory_cache_evictions_total', 'Server inventory cache entries removed', ['reason']
+)
+inventory_cache_size = Gauge('inventory_cache_size', 'Server inventory cache entries')
+inventory_cache_hit_ratio = Gauge('inventory_cache_hit_ratio', 'Server inventory cache hit ratio since start')
+response_bytes_uncompressed = Counter(
+    'http_response_bytes_uncompressed_total', 'Response body bytes before compression', ['encoding']
+)
+response_bytes_compressed = Counter(
+    'http_response_bytes_compressed_total', 'Response body bytes sent after compression', ['encoding']
+)
+event_subscribers = Gauge('event_stream_subscribers', 'Connected Server-Sent Events clients', ['stream'])
+event_client_resets = Counter(
+    'event_stream_client_resets_total', 'SSE clients that fell behind or could not resume and were reset', ['stream']
+)
+lifecycle_transitions = Counter(
+    'lifecycle_transitions_total', 'Simulated server state transitions', ['from_state', 'to_state']
+)
+state_duration = Histogram(
+    'lifecycle_state_duration_seconds', 'Time a simulated server spent in a state before leaving it', ['state'],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600, 86400)
+)
+
+STATE_VALUES = {"FAILED": 0, "RUNNING": 1, "BOOTING": 2}
+
+def set_server_state(server_ids, state):
+    value = STATE_VALUES.get(state, 0)
+    for sid in server_ids:
+        server_state.labels(server_id=str(sid)).set(value)
+
+def forget_server_series(server_ids):
+    for sid in server_ids:
+        for gauge in (server_cpu, server_memory, server_state):
+            try:
+                gauge.remove(str(sid))
+            except KeyError:
+                pass
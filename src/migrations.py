@@ -0,0 +1,80 @@
+from sqlalchemy import text
+from db import db, install_status_count_triggers, rebuild_status_counts
+from logger import logger
+
+# -----------------------------
+# SCHEMA MIGRATIONS
+# -----------------------------
+# Each step runs once per database, in order, inside its own transaction.
+# Applied versions are recorded in schema_version. Steps must be safe to run
+# against databases created by older db.create_all() calls.
+
+def _baseline(connection):
+    db.metadata.create_all(bind=connection)
+
+class MigrationError(RuntimeError):
+    pass
+
+def _check_unique_hostnames(connection):
+    duplicates = connection.execute(text(
+        "SELECT hostname, COUNT(*) FROM server GROUP BY hostname HAVING COUNT(*) > 1 ORDER BY hostname LIMIT 20"
+    )).all()
+    if duplicates:
+        listed = ", ".join(f"{hostname!r} x{count}" for hostname, count in duplicates)
+        raise MigrationError(
+            f"Cannot create unique index ux_server_hostname, duplicate hostnames exist: {listed}. "
+            "Rename or delete the duplicate rows and run the migration again."
+        )
+
+def _server_indexes(connection):
+    _check_unique_hostnames(connection)
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_server_status ON server (status)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_server_ip_address ON server (ip_address)"))
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_server_hostname ON server (hostname)"))
+
+def _server_status_counts(connection):
+    db.metadata.tables["server_status_counts"].create(bind=connection, checkfirst=True)
+    install_status_count_triggers(connection)
+    rebuild_status_counts(connection)
+
+def _requests_log(connection):
+    db.metadata.tables["requests_log"].create(bind=connection, checkfirst=True)
+
+def _lifecycle_events(connection):
+    db.metadata.tables["lifecycle_events"].create(bind=connection, checkfirst=True)
+
+def _server_status_id_index(connection):
+    # (status, id) serves status-filtered keyset pages: WHERE status = ? AND id > ? ORDER BY id
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_server_status_id ON server (status, id)"))
+    connection.execute(text("DROP INDEX IF EXISTS ix_server_status"))
+
+MIGRATIONS = [
+    ("0001_baseline", _baseline),
+    ("0002_server_indexes", _server_indexes),
+    ("0003_server_status_counts", _server_status_counts),
+    ("0004_requests_log", _requests_log),
+    ("0005_lifecycle_events", _lifecycle_events),
+    ("0006_server_status_id_index", _server_status_id_index),
+]
+
+def _applied_versions(connection):
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version (version VARCHAR(64) PRIMARY KEY)"
+    ))
+    return {row[0] for row in connection.execute(text("SELECT version FROM schema_version"))}
+
+def upgrade(engine):
+    with engine.begin() as connection:
+        applied = _applied_versions(connection)
+
+    for version, step in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with engine.begin() as connection:
+                step(connection)
+                connection.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": version})
+        except Exception as e:
+            logger.error("Schema migration %s failed: %s", version, e)
+            raise
+        logger.info("Applied schema migration %s", version)
@@ -0,0 +1,54 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# -----------------------------
+# SAMPLING PROFILER
+# -----------------------------
+# Nothing is installed while idle: a profile is a timer thread that reads
+# sys._current_frames() every interval for the requested duration.
+
+_profile_lock = threading.Lock()
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def _sample_once(counts, skip_idents):
+    names = {t.ident: t.name for t in threading.enumerate()}
+    for ident, frame in sys._current_frames().items():
+        if ident in skip_idents:
+            continue
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        stack.append(names.get(ident, f"thread-{ident}"))
+        counts[";".join(reversed(stack))] += 1
+
+def profile(seconds, interval=0.005):
+    # Returns a Counter of collapsed stacks, or None if a profile is already running
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        counts = Counter()
+        caller = threading.get_ident()
+
+        def run():
+            skip = {caller, threading.get_ident()}
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                _sample_once(counts, skip)
+                time.sleep(interval)
+
+        sampler = threading.Thread(target=run, name="profiler", daemon=True)
+        sampler.start()
+        sampler.join()
+        return counts
+    finally:
+        _profile_lock.release()
+
+def collapsed_stacks(counts):
+    # Brendan Gregg's collapsed format, consumable by flamegraph.pl / speedscope
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
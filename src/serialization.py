@@ -0,0 +1,96 @@
+from itertools import islice
+from flask import Response, current_app, json, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from logger import logger
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib provider is used without it
+    orjson = None
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# -----------------------------
+# JSON PROVIDER
+# -----------------------------
+class OrjsonProvider(DefaultJSONProvider):
+    # Datetimes are passed through to Flask's default hook so responses keep
+    # the same date format as the stdlib provider. Calls with encoder options
+    # orjson does not support (indent, cls, ...) fall back to the stdlib.
+    sort_keys = False
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def _encode(self, obj):
+        option = self.options | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._encode(obj), mimetype=self.mimetype)
+
+def configure_json(app):
+    choice = app.config.get("JSON_PROVIDER", "auto")
+    if choice == "stdlib" or (choice == "auto" and orjson is None):
+        return
+    if orjson is None:
+        logger.warning("JSON_PROVIDER=orjson but orjson is not installed, using the stdlib encoder")
+        return
+    app.json = OrjsonProvider(app)
+
+def rows_requested():
+    return request.args.get("format") == "rows"
+
+def rows_response(fields, rows):
+    # Compact form serialized straight from result tuples, no per-row dicts
+    return current_app.json.response({"fields": list(fields), "rows": [tuple(r) for r in rows]})
+
+def _accepts_ndjson():
+    # Exact match only, so browsers sending */* keep getting regular JSON
+    return any(value == NDJSON_MIMETYPE and q > 0 for value, q in request.accept_mimetypes)
+
+def stream_mode():
+    if _accepts_ndjson():
+        return "ndjson"
+    if request.args.get("stream", "").lower() in ("1", "true", "yes"):
+        return "json"
+    return None
+
+def _chunks(items, size):
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+def _ndjson_body(items, size):
+    for batch in _chunks(items, size):
+        yield "".join(json.dumps(item) + "\n" for item in batch)
+
+def _json_array_body(items, size):
+    first = True
+    yield "["
+    for batch in _chunks(items, size):
+        body = ",".join(json.dumps(item) for item in batch)
+        yield body if first else "," + body
+        first = False
+    yield "]"
+
+def stream_response(items, mode):
+    # items is consumed lazily while the response is written, one chunk per write
+    size = current_app.config.get("STREAM_CHUNK_SIZE", 1000)
+    if mode == "ndjson":
+        body, mimetype = _ndjson_body(items, size), NDJSON_MIMETYPE
+    else:
+        body, mimetype = _json_array_body(items, size), "application/json"
+    return Response(stream_with_context(body), mimetype=mimetype)
@@ -1,18 +1,57 @@
+import heapq
+import json
 import random
+import threading
 import time
-from flask import Blueprint, request, jsonify
-from db import db, Server
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from cache import inventory_cache, publish_invalidation
+from db import db, replica_reads, Server
+from events import lifecycle_events
+from etag import fleet_generation, inventory_generation, make_etag, not_modified, with_etag
 from logger import logger
+from metrics import forget_server_series, lifecycle_transitions, set_server_state, state_duration
+from serialization import rows_requested, rows_response, stream_mode, stream_response
+
+VALID_STATES = ("RUNNING", "FAILED", "BOOTING", "REBOOTING")
+SERVER_FIELDS = ("id", "hostname", "ip_address", "status", "cpu_usage", "memory_usage", "uptime")
+DEFAULT_SERVER_FIELDS = ("id", "hostname", "ip_address", "status")
+USAGE_FIELDS = ("cpu_usage", "memory_usage", "uptime")
+SIM_FIELDS = ("id", "state", "cpu_usage", "memory_usage", "uptime")
+TOP_METRICS = ("cpu", "memory", "uptime", "time_since_failure")
+TOP_K_LIMIT = 100
 
 class SimulatedServer:
-    def __init__(self, server_id):
+    def __init__(self, server_id, kind="sim"):
+        # Standalone ("sim") and DB-backed ("db") simulators can share an id;
+        # key identifies the state machine in transition events and analytics
         self.id = server_id
+        self.key = f"{kind}:{server_id}"
         self.sim_name = f"srv-{server_id}"
         self.state = "RUNNING"
         self.cpu_usage = 0.0
         self.memory_usage = 0
         self.uptime = 0
         self.last_checked = time.time()
+        self.started_at = self.last_checked
+        self.state_since = self.last_checked
+        self.last_failure_at = None
+
+    def transition(self, new_state, now=None):
+        if new_state == self.state:
+            return
+        now = time.time() if now is None else now
+        duration = now - self.state_since
+        lifecycle_transitions.labels(from_state=self.state, to_state=new_state).inc()
+        state_duration.labels(state=self.state).observe(duration)
+        if new_state == "FAILED":
+            self.last_failure_at = now
+        event = (self.key, now, self.state, new_state, duration)
+        for sink in _transition_sinks:
+            sink(event)
+        self.state = new_state
+        self.state_since = now
 
     def update(self):
         try:
@@ -21,36 +60,40 @@ class SimulatedServer:
             self.last_checked = now
 
             if random.random() < 0.05:
-                self.state = "FAILED"
+                self.transition("FAILED", now)
                 self.cpu_usage = 0.0
                 self.memory_usage = 0
                 self.uptime = 0
             else:
                 if self.state == "FAILED" and random.random() < 0.3:
-                    self.state = "BOOTING"
+                    self.transition("BOOTING", now)
                     self.uptime = 0
                 if self.state == "BOOTING":
                     if random.random() < 0.5:
-                        self.state = "RUNNING"
+                        self.transition("RUNNING", now)
                 if self.state == "RUNNING":
                     self.cpu_usage = round(random.uniform(10, 90), 2)
                     self.memory_usage = random.randint(256, 2048)
                     self.uptime += int(elapsed)
                 if self.state == "REBOOTING":
-                    self.state = "RUNNING"
+                    self.transition("RUNNING", now)
 
             # Usar db.session.get() en vez de Server.query.get()
             db_server = db.session.get(Server, self.id)
             if db_server:
+                status_changed = db_server.status != self.state
                 db_server.status = self.state
                 db_server.cpu_usage = self.cpu_usage
                 db_server.memory_usage = self.memory_usage
                 db_server.uptime = self.uptime
                 db.session.commit()
+                if status_changed:
+                    # Cached rows serve status; usage columns there only seed new simulators
+                    _invalidate_servers([db_server.id])
 
             return self.to_dict()
         except Exception as e:
-            logger.error(f"Error updating simulated server {self.id}: {e}")
+            logger.error("Error updating simulated server %s: %s", self.id, e)
             return self.to_dict()
 
     def to_dict(self):
@@ -62,16 +105,115 @@ class SimulatedServer:
             "uptime": self.uptime
         }
 
+    def to_row(self):
+        return (self.id, self.state, self.cpu_usage, self.memory_usage, self.uptime)
+
+# Callables receiving (sim key, timestamp, from_state, to_state, seconds_in_from_state)
+# for every state change; see on_transition
+_transition_sinks = []
+
+def on_transition(sink):
+    _transition_sinks.append(sink)
+    return sink
+
 simulated_servers = [SimulatedServer(i) for i in range(1, 4)]
 _sim_map = {}
 
+# -----------------------------
+# FLEET SNAPSHOT
+# -----------------------------
+# Read endpoints serve the last published snapshot and never advance the
+# simulation; only the background tick and POST /simulation/step do.
+
+class FleetSnapshot:
+    def __init__(self, generation, rows, top=None):
+        self.generation = generation
+        self.taken_at = time.time()
+        self.rows = rows
+        self.top = top or {}
+
+    def dicts(self):
+        return [dict(zip(SIM_FIELDS, row)) for row in self.rows]
+
+_step_lock = threading.Lock()
+_snapshot = None
+
+def rank_fleet(sims, now, k=TOP_K_LIMIT):
+    # Top-k (id, state, value) per metric, highest first: O(n log k) per tick
+    # so GET /fleet/top only slices. Servers that never failed count from
+    # when their simulator started.
+    values = {
+        "cpu": [sim.cpu_usage for sim in sims],
+        "memory": [sim.memory_usage for sim in sims],
+        "uptime": [sim.uptime for sim in sims],
+        "time_since_failure": [now - (sim.last_failure_at or sim.started_at) for sim in sims],
+    }
+    return {
+        metric: [
+            (sims[i].id, sims[i].state, column[i])
+            for i in heapq.nlargest(k, range(len(sims)), key=column.__getitem__)
+        ]
+        for metric, column in values.items()
+    }
+
+def publish_snapshot():
+    global _snapshot
+    sims = list(simulated_servers)
+    rows = tuple(srv.to_row() for srv in sims)
+    _snapshot = FleetSnapshot(fleet_generation.bump(), rows, rank_fleet(sims, time.time()))
+    return _snapshot
+
+def current_snapshot():
+    return _snapshot
+
+def _state_changes(previous, snapshot):
+    before = {row[0]: row[1] for row in previous.rows}
+    return [
+        {"id": row[0], "old_state": before[row[0]], "new_state": row[1], "at": snapshot.taken_at}
+        for row in snapshot.rows if row[0] in before and before[row[0]] != row[1]
+    ]
+
+def step_simulation():
+    with _step_lock:
+        previous = _snapshot
+        for srv in list(simulated_servers):
+            srv.update()
+        snapshot = publish_snapshot()
+        changes = _state_changes(previous, snapshot)
+        if changes:
+            lifecycle_events.publish("lifecycle", {"generation": snapshot.generation, "changes": changes})
+        return snapshot
+
 def get_all_servers():
-    return [srv.update() for srv in simulated_servers]
+    return step_simulation().dicts()
+
+publish_snapshot()
+
+def _new_sim(server_id, status, cpu_usage=0.0, memory_usage=0, uptime=0):
+    sim = SimulatedServer(str(server_id), kind="db")
+    sim.state = status
+    sim.cpu_usage = cpu_usage
+    sim.memory_usage = memory_usage
+    sim.uptime = uptime
+    return sim
+
+def _ensure_sims_for_rows(rows):
+    # Registers simulators for freshly inserted rows in a single map update
+    _sim_map.update({
+        str(r["id"]): _new_sim(r["id"], r["status"])
+        for r in rows if str(r["id"]) not in _sim_map
+    })
+
+def _ensure_sim_for_row(row):
+    key = str(row["id"])
+    if key not in _sim_map:
+        _sim_map[key] = _new_sim(key, row["status"], row["cpu_usage"], row["memory_usage"], row["uptime"])
+    return _sim_map[key]
 
 def _ensure_sim_for_dbserver(db_server):
     key = str(db_server.id)
     if key not in _sim_map:
-        _sim_map[key] = SimulatedServer(key)
+        _sim_map[key] = SimulatedServer(key, kind="db")
         _sim_map[key].state = db_server.status
         _sim_map[key].cpu_usage = db_server.cpu_usage
         _sim_map[key].memory_usage = db_server.memory_usage
@@ -94,8 +236,32 @@ def get_simulated_metrics_for_db_servers():
         logger.error(f"Failed to get simulated metrics for DB servers: {e}")
         return []
 
-def _remove_sim_for_dbserver_id(server_id):
-    _sim_map.pop(str(server_id), None)
+def _load_server_row(server_id):
+    # Read-through lookup of an inventory row; the dict is shared, do not mutate it
+    row = inventory_cache.get(server_id)
+    if row is None:
+        server = db.session.get(Server, server_id)
+        if server is None:
+            return None
+        row = {f: getattr(server, f) for f in SERVER_FIELDS}
+        inventory_cache.put(server_id, row)
+    return row
+
+def _invalidate_servers(server_ids):
+    inventory_cache.invalidate(server_ids)
+    publish_invalidation(db.session, current_app.config.get("CACHE_INVALIDATION_CHANNEL"), server_ids)
+
+def _remove_sims_for_dbserver_ids(server_ids):
+    for server_id in server_ids:
+        _sim_map.pop(str(server_id), None)
+    forget_server_series(server_ids)
+
+def _apply_status_to_sims(server_ids, status):
+    for server_id in server_ids:
+        sim = _sim_map.get(str(server_id))
+        if sim is not None:
+            sim.transition(status)
+    set_server_state(server_ids, status)
 
 # -----------------------------
 # Flask Blueprint
@@ -104,15 +270,15 @@ servers_bp = Blueprint("servers", __name__)
 
 @servers_bp.route("/", methods=["POST"])
 def create_server():
+    row, error = _validate_server_payload(request.get_json(silent=True))
+    if error:
+        return jsonify({"error": error}), 400
     try:
-        data = request.json
-        server = Server(
-            hostname=data["hostname"],
-            ip_address=data["ip_address"],
-            status=data.get("status", "RUNNING")
-        )
+        server = Server(**row)
         db.session.add(server)
         db.session.commit()
+        # Ids can be reused after rows are removed outside the API
+        _invalidate_servers([server.id])
         _ensure_sim_for_dbserver(server)
         return jsonify({
             "id": server.id,
@@ -120,53 +286,374 @@ def create_server():
             "ip_address": server.ip_address,
             "status": server.status
         }), 201
+    except IntegrityError as e:
+        db.session.rollback()
+        if _is_unique_violation(e):
+            return jsonify({"error": "Hostname already exists"}), 409
+        logger.error(f"Failed to create server: {e}")
+        return jsonify({"error": "Failed to create server"}), 500
     except Exception as e:
         logger.error(f"Failed to create server: {e}")
         return jsonify({"error": "Failed to create server"}), 500
 
+def _is_unique_violation(error):
+    # 23505 is PostgreSQL's unique_violation; SQLite only reports it in the message
+    orig = error.orig
+    return getattr(orig, "pgcode", None) == "23505" or "UNIQUE constraint failed" in str(orig)
+
+def _text_field_error(field, value):
+    if not isinstance(value, str) or not value.strip():
+        return f"Missing or invalid '{field}'"
+    if len(value) > 64:
+        return f"'{field}' exceeds 64 characters"
+    return None
+
+def _validate_server_payload(data):
+    if not isinstance(data, dict):
+        return None, "Item must be a JSON object"
+    row = {}
+    for field in ("hostname", "ip_address"):
+        value = data.get(field)
+        error = _text_field_error(field, value)
+        if error:
+            return None, error
+        row[field] = value
+    status = data.get("status", "RUNNING")
+    if status not in VALID_STATES:
+        return None, f"Invalid status '{status}'"
+    row["status"] = status
+    return row, None
+
+def _iter_bulk_payload():
+    # Yields (item, error) pairs without materializing NDJSON bodies in memory
+    if request.mimetype == "application/x-ndjson":
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line), None
+            except ValueError as e:
+                yield None, f"Invalid JSON: {e}"
+        return
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array or an application/x-ndjson body")
+    for item in data:
+        yield item, None
+
+def _insert_rows_individually(chunk, results):
+    # Slow path after a constraint violation: pinpoints the offending items
+    inserted = []
+    stmt = insert(Server).returning(Server.id)
+    for index, row in chunk:
+        try:
+            row["id"] = db.session.execute(stmt, row).scalar_one()
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            results[index] = {"index": index, "error": "Hostname already exists"}
+            continue
+        results[index] = {"index": index, "id": row["id"], "status": "created"}
+        inserted.append(row)
+    _invalidate_servers([row["id"] for row in inserted])
+    _ensure_sims_for_rows(inserted)
+    return len(inserted)
+
+def _insert_chunk(chunk, results):
+    rows = [row for _, row in chunk]
+    try:
+        stmt = insert(Server).returning(Server.id, sort_by_parameter_order=True)
+        ids = db.session.execute(stmt, rows).scalars().all()
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return _insert_rows_individually(chunk, results)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to insert bulk chunk of {len(chunk)} servers: {e}")
+        for index, _ in chunk:
+            results[index] = {"index": index, "error": "Failed to insert server"}
+        return 0
+
+    for (index, row), server_id in zip(chunk, ids):
+        row["id"] = server_id
+        results[index] = {"index": index, "id": server_id, "status": "created"}
+    _invalidate_servers(ids)
+    _ensure_sims_for_rows(rows)
+    return len(rows)
+
+@servers_bp.route("/bulk", methods=["POST"])
+def bulk_create_servers():
+    chunk_size = current_app.config.get("BULK_CHUNK_SIZE", 1000)
+    results = {}
+    chunk = []
+    created = 0
+    count = 0
+    try:
+        for index, (item, error) in enumerate(_iter_bulk_payload()):
+            count += 1
+            if error is None:
+                row, error = _validate_server_payload(item)
+            if error is not None:
+                results[index] = {"index": index, "error": error}
+                continue
+            chunk.append((index, row))
+            if len(chunk) >= chunk_size:
+                created += _insert_chunk(chunk, results)
+                chunk = []
+        if chunk:
+            created += _insert_chunk(chunk, results)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Failed to bulk create servers: {e}")
+        return jsonify({"error": "Failed to bulk create servers"}), 500
+
+    if count == 0:
+        return jsonify({"error": "No servers provided"}), 400
+
+    failed = count - created
+    if failed == 0:
+        code = 201
+    elif created == 0:
+        code = 400
+    else:
+        code = 207
+    return jsonify({
+        "created": created,
+        "failed": failed,
+        "results": [results[i] for i in range(count)]
+    }), code
+
+BULK_UPDATABLE_FIELDS = ("status", "ip_address")
+
+def _bulk_where(data):
+    # Builds the WHERE clauses for a bulk request; refuses to match the whole table
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    clauses = []
+    ids = data.get("ids")
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise ValueError("'ids' must be a list of integers")
+        clauses.append(Server.id.in_(ids))
+    filters = data.get("filter") or {}
+    if not isinstance(filters, dict):
+        raise ValueError("'filter' must be an object")
+    if "status" in filters:
+        if filters["status"] not in VALID_STATES:
+            raise ValueError(f"Invalid status filter '{filters['status']}'")
+        clauses.append(Server.status == filters["status"])
+    if "hostname_prefix" in filters:
+        prefix = filters["hostname_prefix"]
+        if not isinstance(prefix, str) or not prefix:
+            raise ValueError("'hostname_prefix' must be a non-empty string")
+        clauses.append(Server.hostname.startswith(prefix, autoescape=True))
+    if not clauses:
+        raise ValueError("Provide 'ids' and/or a 'filter' (status, hostname_prefix)")
+    return clauses
+
+@servers_bp.route("/bulk", methods=["PATCH"])
+def bulk_update_servers():
+    try:
+        data = request.get_json(silent=True)
+        clauses = _bulk_where(data)
+        values = data.get("set") or {}
+        if not isinstance(values, dict) or not values:
+            raise ValueError("'set' must be a non-empty object")
+        unknown = set(values) - set(BULK_UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Fields not updatable in bulk: {', '.join(sorted(unknown))}")
+        if "status" in values and values["status"] not in VALID_STATES:
+            raise ValueError(f"Invalid status '{values['status']}'")
+        error = _text_field_error("ip_address", values["ip_address"]) if "ip_address" in values else None
+        if error:
+            raise ValueError(error)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        stmt = (
+            update(Server).where(*clauses).values(**values).returning(Server.id)
+            .execution_options(synchronize_session=False)
+        )
+        ids = db.session.execute(stmt).scalars().all()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to bulk update servers: {e}")
+        return jsonify({"error": "Failed to bulk update servers"}), 500
+
+    _invalidate_servers(ids)
+    if "status" in values:
+        _apply_status_to_sims(ids, values["status"])
+    return jsonify({"updated": len(ids), "ids": ids})
+
+@servers_bp.route("/bulk", methods=["DELETE"])
+def bulk_delete_servers():
+    try:
+        clauses = _bulk_where(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        stmt = (
+            delete(Server).where(*clauses).returning(Server.id)
+            .execution_options(synchronize_session=False)
+        )
+        ids = db.session.execute(stmt).scalars().all()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to bulk delete servers: {e}")
+        return jsonify({"error": "Failed to bulk delete servers"}), 500
+
+    _invalidate_servers(ids)
+    _remove_sims_for_dbserver_ids(ids)
+    return jsonify({"deleted": len(ids), "ids": ids})
+
+def _parse_listing_args(args):
+    fields = DEFAULT_SERVER_FIELDS
+    if args.get("fields"):
+        fields = tuple(f.strip() for f in args["fields"].split(",") if f.strip())
+        unknown = [f for f in fields if f not in SERVER_FIELDS]
+        if unknown or not fields:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    limit = args.get("limit", type=int)
+    after = args.get("after", type=int)
+    if ("limit" in args and limit is None) or (limit is not None and limit < 1):
+        raise ValueError("'limit' must be a positive integer")
+    if "after" in args and after is None:
+        raise ValueError("'after' must be an integer server id")
+    if after is not None and limit is None:
+        limit = current_app.config.get("SERVERS_MAX_PAGE_SIZE", 1000)
+    if limit is not None:
+        limit = min(limit, current_app.config.get("SERVERS_MAX_PAGE_SIZE", 1000))
+
+    status = args.get("status")
+    if status is not None and status not in VALID_STATES:
+        raise ValueError(f"Invalid status '{status}'")
+    return fields, limit, after, status
+
+def _server_listing_query(fields, limit=None, after=None, status=None):
+    # Selects only the projected columns; id always comes first as the keyset cursor
+    columns = [getattr(Server, f) for f in fields if f != "id"]
+    stmt = select(Server.id, *columns).order_by(Server.id)
+    if status is not None:
+        stmt = stmt.where(Server.status == status)
+    if after is not None:
+        stmt = stmt.where(Server.id > after)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def _listing_columns(fields):
+    return ("id",) + tuple(f for f in fields if f != "id")
+
+def _row_projector(fields):
+    # Maps query tuples to dicts by position, avoiding Row._mapping lookups
+    columns = _listing_columns(fields)
+    pairs = [(f, columns.index(f)) for f in fields]
+    return lambda row: {f: row[i] for f, i in pairs}
+
+def _iter_server_listing(fields, limit, after, status):
+    # yield_per streams through a server-side cursor on PostgreSQL
+    stmt = _server_listing_query(fields, limit, after, status).execution_options(
+        yield_per=current_app.config.get("STREAM_CHUNK_SIZE", 1000)
+    )
+    project = _row_projector(fields)
+    try:
+        for row in db.session.execute(stmt):
+            yield project(row)
+    except Exception as e:
+        # Re-raised so the connection is cut: the headers are already sent and a
+        # closed array would look like a complete export
+        logger.error(f"Failed to stream servers: {e}")
+        raise
+
 @servers_bp.route("/", methods=["GET"])
+@replica_reads
 def get_servers():
     try:
-        servers = Server.query.all()
-        return jsonify([
-            {"id": s.id, "hostname": s.hostname, "ip_address": s.ip_address, "status": s.status}
-            for s in servers
-        ])
+        fields, limit, after, status = _parse_listing_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    mode = stream_mode()
+    if mode:
+        return stream_response(_iter_server_listing(fields, limit, after, status), mode)
+
+    # Status changes move inventory_generation in every worker. Usage columns are
+    # rewritten on every simulator tick in any process, so those projections get no ETag.
+    etag = None
+    if not set(fields) & set(USAGE_FIELDS):
+        etag = make_etag("servers", inventory_generation.value)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
+    try:
+        rows = db.session.execute(_server_listing_query(fields, limit, after, status)).all()
+        if rows_requested():
+            response = rows_response(_listing_columns(fields), rows)
+        else:
+            response = jsonify(list(map(_row_projector(fields), rows)))
+        if limit is not None and len(rows) == limit:
+            response.headers["X-Next-Cursor"] = str(rows[-1][0])
+        return with_etag(response, etag) if etag else response
     except Exception as e:
         logger.error(f"Failed to fetch servers: {e}")
         return jsonify({"error": "Failed to fetch servers"}), 500
 
 @servers_bp.route("/<int:server_id>", methods=["GET"])
+@replica_reads
 def get_server(server_id):
     try:
-        # Cambiar get_or_404 por manejo manual con db.session.get()
-        server = db.session.get(Server, server_id)
+        server = _load_server_row(server_id)
         if not server:
             return jsonify({"error": "Server not found"}), 404
 
-        return jsonify({
-            "id": server.id,
-            "hostname": server.hostname,
-            "ip_address": server.ip_address,
-            "status": server.status
-        })
+        return jsonify({f: server[f] for f in DEFAULT_SERVER_FIELDS})
     except Exception as e:
         logger.error(f"Failed to fetch server {server_id}: {e}")
         return jsonify({"error": f"Failed to fetch server {server_id}"}), 500
 
 @servers_bp.route("/<int:server_id>", methods=["PUT"])
 def update_server(server_id):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    values = {f: data[f] for f in ("hostname", "ip_address", "status") if f in data}
+    for field in ("hostname", "ip_address"):
+        error = _text_field_error(field, values[field]) if field in values else None
+        if error:
+            return jsonify({"error": error}), 400
+    if "status" in values and values["status"] not in VALID_STATES:
+        return jsonify({"error": f"Invalid status '{values['status']}'"}), 400
+
     try:
-        server = db.session.get(Server, server_id)
-        if not server:
+        if values:
+            found = db.session.execute(
+                update(Server).where(Server.id == server_id).values(**values)
+            ).rowcount > 0
+        else:
+            found = _load_server_row(server_id) is not None
+        if not found:
+            db.session.rollback()
             return jsonify({"error": "Server not found"}), 404
 
-        data = request.json
-        server.hostname = data.get("hostname", server.hostname)
-        server.ip_address = data.get("ip_address", server.ip_address)
-        server.status = data.get("status", server.status)
         db.session.commit()
+        _invalidate_servers([server_id])
         return jsonify({"message": "Server updated"})
+    except IntegrityError as e:
+        db.session.rollback()
+        if _is_unique_violation(e):
+            return jsonify({"error": "Hostname already exists"}), 409
+        logger.error(f"Failed to update server {server_id}: {e}")
+        return jsonify({"error": f"Failed to update server {server_id}"}), 500
     except Exception as e:
         logger.error(f"Failed to update server {server_id}: {e}")
         return jsonify({"error": f"Failed to update server {server_id}"}), 500
@@ -174,13 +661,14 @@ def update_server(server_id):
 @servers_bp.route("/<int:server_id>", methods=["DELETE"])
 def delete_server(server_id):
     try:
-        server = db.session.get(Server, server_id)
-        if not server:
+        deleted = db.session.execute(delete(Server).where(Server.id == server_id)).rowcount
+        if not deleted:
+            db.session.rollback()
             return jsonify({"error": "Server not found"}), 404
 
-        db.session.delete(server)
         db.session.commit()
-        _remove_sim_for_dbserver_id(server_id)
+        _invalidate_servers([server_id])
+        _remove_sims_for_dbserver_ids([server_id])
         return jsonify({"message": "Server deleted"})
     except Exception as e:
         logger.error(f"Failed to delete server {server_id}: {e}")
@@ -189,15 +677,15 @@ def delete_server(server_id):
 @servers_bp.route("/<int:server_id>/metrics", methods=["GET"])
 def server_metrics(server_id):
     try:
-        server = db.session.get(Server, server_id)
+        server = _load_server_row(server_id)
         if not server:
             return jsonify({"error": "Server not found"}), 404
 
-        sim = _ensure_sim_for_dbserver(server)
+        sim = _ensure_sim_for_row(server)
         m = sim.update()
         return jsonify({
-            "server_id": server.id,
-            "hostname": server.hostname,
+            "server_id": server["id"],
+            "hostname": server["hostname"],
             "metrics": {
                 "cpu": m["cpu_usage"],
                 "memory": m["memory_usage"],
@@ -216,6 +704,7 @@ def delete_simulated(server_id):
         index = next((i for i, s in enumerate(simulated_servers) if s.id == server_id), None)
         if index is not None:
             simulated_servers.pop(index)
+            publish_snapshot()
             return jsonify({"message": f"Simulated server {server_id} deleted"}), 200
         return jsonify({"error": "Server not found"}), 404
     except Exception as e:
@@ -0,0 +1,67 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from logger import logger
+from metrics import sql_statements_per_scope, sql_time_per_scope
+
+# -----------------------------
+# SQL STATEMENT ACCOUNTING
+# -----------------------------
+# Every engine reports its statements to the scope active in the current
+# context: one scope per HTTP request and one per background tick.
+
+class QueryScope:
+    __slots__ = ("label", "statements", "seconds")
+
+    def __init__(self, label):
+        self.label = label
+        self.statements = 0
+        self.seconds = 0.0
+
+_current_scope = ContextVar("sql_scope", default=None)
+
+# The start time lives on the execution context, which is discarded whether
+# the statement succeeds or raises
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_stats_start = time.perf_counter()
+
+def _record(context):
+    started = getattr(context, "_sql_stats_start", None)
+    scope = _current_scope.get()
+    if scope is not None and started is not None:
+        scope.statements += 1
+        scope.seconds += time.perf_counter() - started
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record(context)
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    _record(exception_context.execution_context)
+
+def begin_scope(label):
+    scope = QueryScope(label)
+    return scope, _current_scope.set(scope)
+
+def end_scope(scope, token, budget=None):
+    _current_scope.reset(token)
+    sql_statements_per_scope.labels(scope=scope.label).observe(scope.statements)
+    sql_time_per_scope.labels(scope=scope.label).observe(scope.seconds)
+    if budget and scope.statements > budget:
+        logger.warning(
+            "%s issued %d SQL statements (budget %d, %.1f ms in DB)",
+            scope.label, scope.statements, budget, scope.seconds * 1000
+        )
+
+@contextmanager
+def sql_scope(label, budget=None):
+    scope, token = begin_scope(label)
+    try:
+        yield scope
+    finally:
+        end_scope(scope, token, budget)
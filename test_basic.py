@@ -36,3 +36,223 @@ def test_metrics_endpoint(client):
     assert r.status_code == 200
     txt = r.get_data(as_text=True)
     assert ("requests_total" in txt) or ("server_cpu_usage" in txt)
+
+def test_request_log_batched(client):
+    from app import request_log_writer
+    from db import RequestLog
+    app.config["REQUEST_LOG_ENABLED"] = True
+    try:
+        client.get("/health")
+        client.get("/lifecycle")
+    finally:
+        app.config["REQUEST_LOG_ENABLED"] = False
+    request_log_writer.flush()
+    with app.app_context():
+        paths = [r.path for r in RequestLog.query.order_by(RequestLog.id)]
+    assert paths == ["/health", "/lifecycle"]
+
+def test_request_log_drops_when_full():
+    from batch_writer import BatchWriter
+    from db import RequestLog
+    writer = BatchWriter(app, RequestLog.__table__, "test", max_queue=1)
+    assert writer.submit({"path": "/a"})
+    assert not writer.submit({"path": "/b"})
+
+def test_debug_profile(client):
+    r = client.get("/debug/profile?seconds=0.2")
+    assert r.status_code == 200
+    stacks = r.get_data(as_text=True).splitlines()
+    assert any(line.startswith("background_server_updates;") for line in stacks)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+
+    assert client.get("/debug/profile?seconds=0").status_code == 400
+
+def test_debug_memory(client):
+    r = client.get("/debug/memory")
+    assert r.status_code == 200
+    assert r.get_json()["metric_series"]["total"] > 0
+
+    assert client.post("/debug/memory/diff").status_code == 409
+    for query in ("frames=0", "frames=-1", "frames=101", "top=0", "top=-5"):
+        assert client.post(f"/debug/memory/start?{query}").status_code == 400
+    assert client.get("/debug/memory?top=0").status_code == 400
+    assert client.get("/debug/memory?top=501").status_code == 400
+    client.post("/debug/memory/start")
+    try:
+        client.post("/debug/memory/snapshot")
+        leak = [bytearray(1024) for _ in range(100)]
+        r = client.post("/debug/memory/diff")
+        assert r.status_code == 200
+        assert "size_diff_kb" in r.get_json()["top"][0]
+        assert "top" in client.get("/debug/memory").get_json()["tracemalloc"]
+        del leak
+    finally:
+        client.post("/debug/memory/stop")
+
+def test_lifecycle_conditional_get(client):
+    r = client.get("/lifecycle")
+    r2 = client.get("/lifecycle", headers={"If-None-Match": r.headers["ETag"]})
+    assert r2.status_code == 304
+
+def test_json_provider_round_trip():
+    from datetime import datetime, timezone
+    from flask import Flask
+    from serialization import OrjsonProvider, orjson
+    if orjson is None:
+        pytest.skip("orjson not installed")
+    provider = OrjsonProvider(Flask(__name__))
+    stamp = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    assert provider.loads(provider.dumps({"at": stamp, 1: "x"})) == {"at": "Tue, 02 Jan 2024 00:00:00 GMT", "1": "x"}
+    assert provider.dumps({"a": 1}, indent=2) == '{\n  "a": 1\n}'
+
+def test_simulated_reads_do_not_advance(client):
+    first = client.get("/simulated-servers")
+    assert client.get("/lifecycle").status_code == 200
+    again = client.get("/simulated-servers", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+
+    r = client.post("/simulation/step", json={"steps": 2})
+    assert r.status_code == 200
+    assert r.get_json()["servers"] == len(first.get_json())
+    assert client.get("/simulated-servers", headers={"If-None-Match": first.headers["ETag"]}).status_code == 200
+    assert client.post("/simulation/step", json={"steps": 0}).status_code == 400
+
+def test_lifecycle_event_stream(client):
+    from events import lifecycle_events
+    change = {"changes": [{"id": 1, "old_state": "RUNNING", "new_state": "FAILED", "at": 0}]}
+    first = lifecycle_events.publish("lifecycle", change)
+    second = lifecycle_events.publish("lifecycle", change)
+
+    r = client.get("/events/lifecycle", headers={"Last-Event-ID": lifecycle_events.format_id(first)}, buffered=False)
+    assert r.mimetype == "text/event-stream"
+    stream = iter(r.response)
+    assert next(stream).startswith(b"retry:")
+    body = next(stream).decode()
+    assert f"id: {lifecycle_events.format_id(second)}\nevent: lifecycle\n" in body
+    assert lifecycle_events.format_id(first) + "\n" not in body
+    r.close()
+    assert lifecycle_events.subscribers == 0
+
+    r = client.get("/events/lifecycle", headers={"Last-Event-ID": "stale-1"}, buffered=False)
+    stream = iter(r.response)
+    next(stream)
+    assert next(stream).startswith(b"event: reset")
+    r.close()
+
+    for _ in range(3):
+        client.head("/events/lifecycle").close()
+    assert lifecycle_events.subscribers == 0
+
+def test_lifecycle_transitions_recorded(client):
+    from app import lifecycle_event_writer
+    from db import LifecycleEvent
+    from servers import SimulatedServer
+    sim = SimulatedServer(99)
+    start = sim.state_since
+    app.config["LIFECYCLE_EVENTS_ENABLED"] = True
+    try:
+        sim.transition("FAILED", now=start + 30)
+        sim.transition("FAILED", now=start + 35)
+        sim.transition("BOOTING", now=start + 40)
+    finally:
+        app.config["LIFECYCLE_EVENTS_ENABLED"] = False
+    lifecycle_event_writer.flush()
+    assert sim.last_failure_at == start + 30
+    with app.app_context():
+        rows = LifecycleEvent.query.filter_by(server_id="sim:99").order_by(LifecycleEvent.id).all()
+    assert [(r.from_state, r.to_state, r.duration_s) for r in rows] == [
+        ("RUNNING", "FAILED", 30.0), ("FAILED", "BOOTING", 10.0)
+    ]
+
+def test_availability_tracker():
+    from analytics import AvailabilityTracker, availability_report
+    tracker = AvailabilityTracker(retention=1000, bucket_seconds=10)
+    tracker.ensure("a", "RUNNING", 0)
+    tracker.record(("a", 100, "RUNNING", "FAILED", 100))
+    tracker.record(("a", 120, "FAILED", "BOOTING", 20))
+    tracker.record(("a", 130, "BOOTING", "RUNNING", 10))
+    tracker.record(("b", 150, "RUNNING", "FAILED", 50))
+
+    report = availability_report(tracker, window=200, now=200)
+    a = report["servers"][0]
+    assert a["id"] == "a" and a["failures"] == 1
+    assert a["uptime_fraction"] == 0.85 and a["mtbf_seconds"] == 170 and a["mttr_seconds"] == 30
+    assert report["fleet"] == {"uptime_fraction": 0.733333, "observed_seconds": 300, "failures": 2,
+                               "mtbf_seconds": 110, "mttr_seconds": 30, "servers": 2}
+
+    recent = availability_report(tracker, window=50, now=200)["servers"][0]
+    assert recent["failures"] == 0 and recent["uptime_fraction"] == 1.0
+    # Windows start on a bucket boundary: 45s at t=205 covers 150..205
+    assert availability_report(tracker, window=45, now=205)["window_seconds"] == 50
+
+def test_availability_tracker_memory_is_bounded():
+    from analytics import AvailabilityTracker
+    tracker = AvailabilityTracker(retention=3600, bucket_seconds=60)
+    tracker.ensure("a", "RUNNING", 0)
+    history = tracker._servers["a"]
+    size = len(history.sums)
+    states = ("RUNNING", "FAILED")
+    for i in range(1, 3001):
+        tracker.record(("a", i * 10.0, states[(i - 1) % 2], states[i % 2], 10.0))
+    assert len(history.sums) == size and len(history.slots) == 61
+    up, down, failures, repairs, repair_time = tracker.summary(3600, now=30000.0)["a"]
+    # 26400..30000; the repair landing on 26400 opens the window
+    assert (up, down, failures, repairs, repair_time) == (1800.0, 1800.0, 180, 181, 1810.0)
+
+def test_availability_endpoint(client):
+    r = client.get("/analytics/availability?window=1h")
+    assert r.status_code == 200
+    assert r.get_json()["fleet"]["servers"] >= 1
+    assert client.get("/analytics/availability?window=soon").status_code == 400
+
+def test_rank_fleet():
+    from servers import SimulatedServer, rank_fleet
+    sims = [SimulatedServer(i) for i in range(1, 6)]
+    for sim, cpu in zip(sims, [40.0, 90.0, 10.0, 75.0, 60.0]):
+        sim.cpu_usage = cpu
+    sims[0].started_at = 0.0
+    sims[1].last_failure_at = 500.0
+    top = rank_fleet(sims, now=1000.0, k=3)
+    assert [sid for sid, _, _ in top["cpu"]] == [2, 4, 5]
+    assert top["time_since_failure"][:2] == [(1, "RUNNING", 1000.0), (2, "RUNNING", 500.0)]
+
+def test_fleet_top_endpoint(client):
+    r = client.get("/fleet/top?metric=memory&k=2")
+    assert r.status_code == 200
+    values = [s["value"] for s in r.get_json()["servers"]]
+    assert len(values) <= 2 and values == sorted(values, reverse=True)
+    assert client.get("/fleet/top?metric=disk").status_code == 400
+    assert client.get("/fleet/top?k=1000").status_code == 400
+
+def test_simulator_writes_keep_replica_reads(client, monkeypatch):
+    import db as db_module
+    sid = client.post("/servers/", json={"hostname": "ryw-1", "ip_address": "10.6.0.1"}).get_json()["id"]
+    assert db_module._last_request_write > 0
+    monkeypatch.setattr(db_module, "_last_request_write", 0.0)
+    client.get("/metrics")
+    client.get(f"/servers/{sid}/metrics")
+    assert db_module._last_request_write == 0.0
+
+def test_availability_keeps_standalone_and_db_simulators_apart():
+    from analytics import AvailabilityTracker, _sync_fleet
+    from servers import _sim_map, _new_sim, simulated_servers
+    tracker = AvailabilityTracker()
+    _sim_map["1"] = _new_sim(1, "FAILED")
+    try:
+        _sync_fleet(tracker)
+        expected = len(simulated_servers) + len(_sim_map)
+    finally:
+        _sim_map.pop("1")
+    keys = set(tracker.summary(60))
+    assert {"sim:1", "db:1"} <= keys
+    assert len(keys) == expected
+
+def test_availability_cache_is_keyed_by_bucket(client, monkeypatch):
+    import analytics
+    monkeypatch.setitem(app.config, "ANALYTICS_CACHE_TTL", 60)
+    monkeypatch.setattr(analytics, "_report_cache", {"stale": (0.0, {})})
+    for window in ("1s", "59m", "1h", "3600"):
+        assert client.get(f"/analytics/availability?window={window}").status_code == 200
+    assert list(analytics._report_cache) == [1]
+    client.get("/analytics/availability?window=2h")
+    assert sorted(analytics._report_cache) == [1, 2]
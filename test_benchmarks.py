@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath("benchmarks"))
+
+import json
+import pytest
+from compare import compare
+
+
+def _run(**medians):
+    return {"benchmarks": {
+        name: {"samples": [m * 0.98, m, m * 1.02, m, m * 1.01]} for name, m in medians.items()
+    }}
+
+
+def test_compare_flags_regressions_beyond_budget():
+    baseline = _run(metrics_render=0.010, crud=0.005, tick=0.100)
+    candidate = _run(metrics_render=0.015, crud=0.0052, tick=0.060)
+    report = compare(baseline, candidate, budget=0.10)
+    verdicts = {r["name"]: r["verdict"] for r in report["results"]}
+    assert verdicts == {"metrics_render": "regression", "crud": "ok", "tick": "improvement"}
+    assert report["regressions"] == ["metrics_render"]
+
+
+def test_compare_ignores_noisy_deltas_and_honours_prefix_budgets():
+    noisy = {"benchmarks": {"crud": {"samples": [0.004, 0.005, 0.009, 0.003, 0.008]}}}
+    slower = {"benchmarks": {"crud": {"samples": [0.006, 0.0065, 0.0062, 0.0061, 0.0063]}}}
+    assert compare(noisy, slower)["regressions"] == []
+
+    report = compare(_run(crud=0.005), _run(crud=0.0056), budget=0.5, budgets={"cr": 0.05})
+    assert report["regressions"] == ["crud"]
+
+
+@pytest.mark.skipif(
+    not (os.environ.get("BENCH_BASELINE") and os.environ.get("BENCH_CANDIDATE")),
+    reason="set BENCH_BASELINE and BENCH_CANDIDATE to benchmarks/run.py result files"
+)
+def test_no_benchmark_regressions():
+    with open(os.environ["BENCH_BASELINE"]) as f:
+        baseline = json.load(f)
+    with open(os.environ["BENCH_CANDIDATE"]) as f:
+        candidate = json.load(f)
+    report = compare(baseline, candidate, budget=float(os.environ.get("BENCH_BUDGET", 0.10)))
+    assert report["regressions"] == []
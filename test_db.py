@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath("src"))
+
+import pytest
+from flask import Flask, g
+from db import MonitorSQLAlchemy, RoutingSession, Server
+
+
+db = MonitorSQLAlchemy(session_options={"class_": RoutingSession})
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    app = Flask("replica_test")
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}",
+        SQLALCHEMY_BINDS={"replica_0": f"sqlite:///{tmp_path / 'replica.db'}"},
+        REPLICA_BIND_KEYS=["replica_0"],
+        REPLICA_READ_AFTER_WRITE_SECONDS=60,
+    )
+    db.init_app(app)
+    with app.app_context():
+        Server.metadata.create_all(db.engines[None])
+        Server.metadata.create_all(db.engines["replica_0"])
+    return app
+
+
+def test_replica_routing_and_read_your_writes(replica_app, monkeypatch):
+    import db as db_module
+    monkeypatch.setattr(db_module, "_last_request_write", 0.0)
+    with replica_app.app_context():
+        replica = db.engines["replica_0"]
+        primary = db.engines[None]
+        query = db.select(Server)
+
+        assert db.session.get_bind(clause=query) is primary
+        g.replica_reads = True
+        assert db.session.get_bind(clause=query) is replica
+        assert db.session.get_bind(clause=db.insert(Server)) is primary
+
+        with replica_app.test_request_context("/servers/", method="GET"):
+            db.session.add(Server(hostname="ro", ip_address="10.0.0.2"))
+            db.session.commit()
+        assert db.session.get_bind(clause=query) is replica
+
+        with replica_app.test_request_context("/servers/", method="POST"):
+            db.session.add(Server(hostname="rw", ip_address="10.0.0.1"))
+            db.session.commit()
+        assert db.session.get_bind(clause=query) is primary
+
+
+def test_app_boots_on_sqlite_database_url(tmp_path):
+    import subprocess
+    env = dict(
+        os.environ, DATABASE_URL="sqlite:///:memory:", SIMULATOR_ENABLED="false",
+        LOG_FILE=str(tmp_path / "app.log"),
+    )
+    env.pop("FLASK_ENV", None)
+    result = subprocess.run(
+        [sys.executable, "-c", "import app\nwith app.app.app_context(): print(sorted(app.db.engines, key=str))"],
+        cwd=os.path.abspath("src"), env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "background" in result.stdout
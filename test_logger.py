@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath("src"))
+
+import logging
+from logger import RateLimitFilter
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _record(created, name="infra_monitor", msg="Metrics scraped for %d servers", args=(3,)):
+    record = logging.LogRecord(name, logging.INFO, __file__, 0, msg, args, None)
+    record.created = created
+    return record
+
+
+def test_rate_limit_collapses_repeats():
+    sink = ListHandler()
+    rate_filter = RateLimitFilter({"infra_monitor": 60}, handler=sink)
+    rate_filter.SWEEP_INTERVAL = 1e9
+
+    assert rate_filter.filter(_record(0))
+    assert not any(rate_filter.filter(_record(t)) for t in range(1, 50))
+    assert rate_filter.filter(_record(61, name="other"))
+
+    record = _record(61)
+    assert rate_filter.filter(record)
+    assert "49 similar messages suppressed" in record.getMessage()
+
+
+def test_rate_limit_sweep_reports_stopped_messages():
+    sink = ListHandler()
+    rate_filter = RateLimitFilter({"infra_monitor": 10}, handler=sink)
+    rate_filter.filter(_record(0))
+    rate_filter.filter(_record(1))
+    rate_filter.filter(_record(30, msg="unrelated"))
+    assert len(sink.records) == 1
+    assert "1 similar messages suppressed" in sink.records[0].getMessage()
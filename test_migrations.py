@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath("src"))
+
+from sqlalchemy import create_engine, text
+import pytest
+from migrations import MIGRATIONS, MigrationError, upgrade
+
+
+def test_upgrade_legacy_schema():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE server (id INTEGER PRIMARY KEY, hostname VARCHAR(64) NOT NULL, "
+            "ip_address VARCHAR(64) NOT NULL, status VARCHAR(20), cpu_usage FLOAT, "
+            "memory_usage INTEGER, uptime INTEGER)"
+        ))
+        conn.execute(text(
+            "INSERT INTO server (hostname, ip_address, status) VALUES "
+            "('a', '10.0.0.1', 'RUNNING'), ('b', '10.0.0.2', 'FAILED'), ('c', '10.0.0.3', 'RUNNING')"
+        ))
+
+    upgrade(engine)
+    upgrade(engine)
+
+    with engine.begin() as conn:
+        versions = [r[0] for r in conn.execute(text("SELECT version FROM schema_version ORDER BY version"))]
+        assert versions == [v for v, _ in MIGRATIONS]
+        indexes = {r[1] for r in conn.execute(text("PRAGMA index_list('server')"))}
+        assert {"ix_server_status_id", "ix_server_ip_address", "ux_server_hostname"} <= indexes
+        plan = " ".join(str(r[-1]) for r in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM server WHERE status = 'RUNNING' AND id > 1 ORDER BY id LIMIT 10"
+        )))
+        assert "ix_server_status_id" in plan and "TEMP B-TREE" not in plan
+
+        conn.execute(text("UPDATE server SET status = 'BOOTING' WHERE hostname = 'b'"))
+        conn.execute(text("DELETE FROM server WHERE hostname = 'c'"))
+        counts = dict(conn.execute(text("SELECT status, total FROM server_status_counts")).all())
+    assert counts == {"RUNNING": 1, "FAILED": 0, "BOOTING": 1}
+
+
+def test_upgrade_reports_duplicate_hostnames():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE server (id INTEGER PRIMARY KEY, hostname VARCHAR(64) NOT NULL, "
+            "ip_address VARCHAR(64) NOT NULL, status VARCHAR(20), cpu_usage FLOAT, "
+            "memory_usage INTEGER, uptime INTEGER)"
+        ))
+        conn.execute(text(
+            "INSERT INTO server (hostname, ip_address) VALUES ('a', '10.0.0.1'), ('a', '10.0.0.2'), ('b', '10.0.0.3')"
+        ))
+
+    with pytest.raises(MigrationError, match="'a' x2"):
+        upgrade(engine)
@@ -1,3 +1,4 @@
+import json
 import pytest
 from app import app, db
 
@@ -58,3 +59,310 @@ def test_delete_server(client):
 
     response = client.get(f"/servers/{server_id}")
     assert response.status_code == 404
+
+def test_bulk_create_servers(client):
+    response = client.post("/servers/bulk", json=[
+        {"hostname": "bulk-1", "ip_address": "10.1.0.1"},
+        {"hostname": "bulk-2", "ip_address": "10.1.0.2", "status": "BOOTING"},
+        {"hostname": "bulk-3"}
+    ])
+    assert response.status_code == 207
+    data = response.get_json()
+    assert data["created"] == 2
+    assert data["failed"] == 1
+    assert "id" in data["results"][0]
+    assert "error" in data["results"][2]
+
+    response = client.get(f"/servers/{data['results'][1]['id']}")
+    assert response.get_json()["status"] == "BOOTING"
+
+def test_bulk_create_servers_ndjson(client):
+    body = "\n".join(
+        '{"hostname": "nd-%d", "ip_address": "10.2.0.%d"}' % (i, i) for i in range(5)
+    ) + "\nnot-json\n"
+    response = client.post("/servers/bulk", data=body, content_type="application/x-ndjson")
+    assert response.status_code == 207
+    data = response.get_json()
+    assert data["created"] == 5
+    assert data["results"][5]["error"].startswith("Invalid JSON")
+
+def test_bulk_update_and_delete_servers(client):
+    client.post("/servers/bulk", json=[
+        {"hostname": "rack7-a", "ip_address": "10.7.0.1"},
+        {"hostname": "rack7-b", "ip_address": "10.7.0.2"},
+        {"hostname": "rack8-a", "ip_address": "10.8.0.1"}
+    ])
+
+    response = client.patch("/servers/bulk", json={
+        "filter": {"hostname_prefix": "rack7-"},
+        "set": {"status": "FAILED"}
+    })
+    assert response.status_code == 200
+    assert response.get_json()["updated"] == 2
+
+    response = client.delete("/servers/bulk", json={"filter": {"status": "FAILED"}})
+    assert response.status_code == 200
+    assert response.get_json()["deleted"] == 2
+
+    hostnames = [s["hostname"] for s in client.get("/servers/").get_json()]
+    assert hostnames == ["rack8-a"]
+
+def test_bulk_delete_requires_selector(client):
+    response = client.delete("/servers/bulk", json={})
+    assert response.status_code == 400
+
+def test_bulk_selector_validation(client):
+    for selector in ({"filter": {"status": ["RUNNING"]}}, {"filter": {"status": "UNKNOWN"}}, {"ids": [True]}):
+        assert client.delete("/servers/bulk", json=selector).status_code == 400
+        assert client.patch("/servers/bulk", json=dict(selector, set={"status": "FAILED"})).status_code == 400
+
+def test_bulk_update_validates_ip_address(client):
+    for ip in (42, "", "1" * 65):
+        response = client.patch("/servers/bulk", json={"ids": [1], "set": {"ip_address": ip}})
+        assert response.status_code == 400
+
+def test_get_servers_keyset_pagination(client):
+    client.post("/servers/bulk", json=[
+        {"hostname": f"page-{i}", "ip_address": f"10.9.0.{i}", "status": "FAILED" if i % 2 else "RUNNING"}
+        for i in range(5)
+    ])
+
+    response = client.get("/servers/?limit=2&fields=hostname")
+    assert response.get_json() == [{"hostname": "page-0"}, {"hostname": "page-1"}]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(f"/servers/?limit=2&after={cursor}&fields=id,hostname")
+    assert [s["hostname"] for s in response.get_json()] == ["page-2", "page-3"]
+
+    response = client.get("/servers/?status=FAILED&fields=hostname")
+    assert [s["hostname"] for s in response.get_json()] == ["page-1", "page-3"]
+    assert "X-Next-Cursor" not in response.headers
+
+    assert client.get("/servers/?fields=password").status_code == 400
+
+def test_get_servers_streaming(client):
+    client.post("/servers/bulk", json=[
+        {"hostname": f"stream-{i}", "ip_address": f"10.3.0.{i}"} for i in range(3)
+    ])
+
+    response = client.get("/servers/", headers={"Accept": "application/x-ndjson"})
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["hostname"] for line in lines] == ["stream-0", "stream-1", "stream-2"]
+
+    response = client.get("/servers/?stream=1&fields=hostname")
+    assert response.get_json() == [{"hostname": f"stream-{i}"} for i in range(3)]
+
+def test_invalid_server_payload_rejected(client):
+    assert client.post("/servers/", json={"hostname": None, "ip_address": "10.4.1.1"}).status_code == 400
+    response = client.post("/servers/", json={"hostname": "bad-state", "ip_address": "10.4.1.1", "status": "X"})
+    assert response.status_code == 400
+    server_id = client.post("/servers/", json={"hostname": "valid", "ip_address": "10.4.1.1"}).get_json()["id"]
+    for payload in ({"hostname": None}, {"ip_address": ""}, {"status": "X"}, ["valid"]):
+        assert client.put(f"/servers/{server_id}", json=payload).status_code == 400
+    client.post("/servers/", json={"hostname": "taken", "ip_address": "10.4.1.2"})
+    assert client.put(f"/servers/{server_id}", json={"hostname": "taken"}).status_code == 409
+
+def test_duplicate_hostname_rejected(client):
+    client.post("/servers/", json={"hostname": "dup", "ip_address": "10.4.0.1"})
+    response = client.post("/servers/", json={"hostname": "dup", "ip_address": "10.4.0.2"})
+    assert response.status_code == 409
+
+    response = client.post("/servers/bulk", json=[
+        {"hostname": "dup", "ip_address": "10.4.0.3"},
+        {"hostname": "not-dup", "ip_address": "10.4.0.4"}
+    ])
+    data = response.get_json()
+    assert data["created"] == 1
+    assert data["results"][0]["error"] == "Hostname already exists"
+
+def test_status_counts_maintained(client):
+    from db import server_status_counts
+    client.post("/servers/bulk", json=[
+        {"hostname": f"count-{i}", "ip_address": f"10.5.0.{i}"} for i in range(4)
+    ])
+    client.patch("/servers/bulk", json={"filter": {"hostname_prefix": "count-"}, "set": {"status": "FAILED"}})
+    client.delete("/servers/bulk", json={"filter": {"hostname_prefix": "count-3"}})
+    with app.app_context():
+        counts = server_status_counts()
+    assert counts.get("FAILED", 0) + counts.get("RUNNING", 0) + counts.get("BOOTING", 0) == 3
+
+def test_sql_statements_counted_per_route(client):
+    from sql_stats import sql_scope
+    with app.app_context(), sql_scope("test") as scope:
+        db.session.execute(db.select(db.literal(1)))
+        db.session.execute(db.select(db.literal(2)))
+    assert scope.statements == 2
+
+    server_id = client.post("/servers/", json={"hostname": "sql", "ip_address": "10.6.0.1"}).get_json()["id"]
+    client.get(f"/servers/{server_id}")
+    txt = client.get("/metrics").get_data(as_text=True)
+    assert 'db_statements_per_scope_count{scope="GET /servers/<int:server_id>"}' in txt
+
+def test_server_lookup_cache_invalidated_on_write(client):
+    from cache import inventory_cache
+    server_id = client.post("/servers/", json={"hostname": "cached", "ip_address": "10.7.7.7"}).get_json()["id"]
+
+    client.get(f"/servers/{server_id}")
+    hits = inventory_cache.hits
+    assert client.get(f"/servers/{server_id}").get_json()["hostname"] == "cached"
+    assert inventory_cache.hits == hits + 1
+
+    client.put(f"/servers/{server_id}", json={"hostname": "renamed"})
+    assert client.get(f"/servers/{server_id}").get_json()["hostname"] == "renamed"
+
+    client.delete(f"/servers/{server_id}")
+    assert client.get(f"/servers/{server_id}").status_code == 404
+    assert "inventory_cache_hit_ratio" in client.get("/metrics").get_data(as_text=True)
+
+def test_conditional_get_servers(client):
+    client.post("/servers/", json={"hostname": "etag-1", "ip_address": "10.8.8.1"})
+    response = client.get("/servers/")
+    etag = response.headers["ETag"]
+    assert "no-cache" in response.headers["Cache-Control"]
+
+    response = client.get("/servers/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.get_data() == b""
+
+    assert client.get("/servers/?fields=id", headers={"If-None-Match": etag}).status_code == 200
+
+    client.post("/servers/", json={"hostname": "etag-2", "ip_address": "10.8.8.2"})
+    response = client.get("/servers/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
+
+def test_listing_rows_format(client):
+    client.post("/servers/", json={"hostname": "rows-1", "ip_address": "10.9.9.1"})
+    body = client.get("/servers/?format=rows&fields=hostname").get_json()
+    assert body["fields"] == ["id", "hostname"]
+    assert body["rows"][0][1] == "rows-1"
+    assert client.get("/servers/?fields=hostname").get_json() == [{"hostname": "rows-1"}]
+
+def test_listing_compression(client):
+    import gzip
+    import zlib
+    client.post("/servers/bulk", json=[{"hostname": f"gz-{i}", "ip_address": "10.7.0.1"} for i in range(50)])
+
+    plain = client.get("/servers/")
+    assert "Content-Encoding" not in plain.headers
+    assert plain.headers["Vary"] == "Accept-Encoding"
+
+    response = client.get("/servers/", headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.data)) == plain.get_json()
+    assert response.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    headers = {"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]}
+    revalidated = client.get("/servers/", headers=headers)
+    assert revalidated.status_code == 304
+
+    streamed = client.get("/servers/", headers={"Accept": "application/x-ndjson", "Accept-Encoding": "deflate"})
+    assert streamed.headers["Content-Encoding"] == "deflate"
+    assert len(zlib.decompress(streamed.data).splitlines()) == 50
+
+    small = client.get("/servers/?limit=1", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+def test_cached_row_follows_simulator_status(client):
+    from unittest.mock import patch
+    from servers import _ensure_sim_for_row, _load_server_row
+    sid = client.post("/servers/", json={"hostname": "cache-sim", "ip_address": "10.5.0.1"}).get_json()["id"]
+    assert client.get(f"/servers/{sid}").get_json()["status"] == "RUNNING"
+    with app.app_context():
+        sim = _ensure_sim_for_row(_load_server_row(sid))
+        sim.transition("FAILED")
+        with patch("servers.random.random", return_value=0.99):
+            sim.update()
+    assert client.get(f"/servers/{sid}").get_json()["status"] == "FAILED"
+
+def test_stream_error_is_not_a_complete_body(client):
+    from unittest.mock import patch
+    for i in range(3):
+        client.post("/servers/", json={"hostname": f"cut-{i}", "ip_address": "10.4.0.1"})
+
+    def failing_projector(fields):
+        seen = []
+
+        def project(row):
+            seen.append(row)
+            if len(seen) == 3:
+                raise RuntimeError("connection lost")
+            return {"id": row[0]}
+        return project
+
+    with patch("servers._row_projector", failing_projector):
+        response = client.get("/servers/?stream=1")
+        with pytest.raises(RuntimeError):
+            response.get_data()
+
+def test_listing_etag_survives_polling(client):
+    from unittest.mock import patch
+    from servers import _sim_map
+    # ids 1-3 are also written by the standalone simulators
+    for i in range(4):
+        sid = client.post("/servers/", json={"hostname": f"poll-{i}", "ip_address": "10.3.0.1"}).get_json()["id"]
+    _sim_map.clear()
+    etag = client.get("/servers/?status=RUNNING&after=3").headers["ETag"]
+    # Usage columns change on every tick in any worker, so they are never validated
+    assert "ETag" not in client.get("/servers/?fields=id,cpu_usage").headers
+
+    with patch("servers.random.random", return_value=0.99):
+        client.get("/metrics")
+        client.get(f"/servers/{sid}/metrics")
+
+    assert client.get("/servers/?status=RUNNING&after=3", headers={"If-None-Match": etag}).status_code == 304
+
+def test_listing_etag_follows_other_workers(client):
+    from unittest.mock import patch
+    from cache import _apply_notification, inventory_cache
+    with patch("servers.publish_invalidation") as publish:
+        sid = client.post("/servers/", json={"hostname": "peer-1", "ip_address": "10.3.1.1"}).get_json()["id"]
+        client.post("/servers/bulk", json=[{"hostname": "peer-2", "ip_address": "10.3.1.2"}])
+    assert [c.args[2] for c in publish.call_args_list] == [[sid], [sid + 1]]
+    with patch("servers.publish_invalidation") as publish, patch("servers.random.random", return_value=0.0):
+        client.get(f"/servers/{sid}/metrics")
+    assert [c.args[2] for c in publish.call_args_list] == [[sid]]
+
+    etag = client.get("/servers/").headers["ETag"]
+    assert client.get("/servers/", headers={"If-None-Match": etag}).status_code == 304
+    # A status change persisted by another worker or lifecycle_manager arrives as a notification
+    _apply_notification(inventory_cache, str(sid))
+    assert client.get("/servers/", headers={"If-None-Match": etag}).status_code == 200
+
+def test_failed_statements_do_not_leak_timing_state(client):
+    from sql_stats import sql_scope
+    with app.app_context(), db.engine.connect() as conn, sql_scope("test") as scope:
+        for _ in range(3):
+            with pytest.raises(Exception):
+                conn.exec_driver_sql("SELECT * FROM missing_table")
+        conn.exec_driver_sql("SELECT 1")
+        assert "sql_stats_start" not in conn.info
+    assert scope.statements == 4
+
+def test_request_time_simulator_writes_use_primary_pool(client, tmp_path):
+    import servers
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import QueuePool
+    from db import Server
+    # A real background bind whose only connection is busy, as under load
+    background = create_engine(
+        f"sqlite:///{tmp_path / 'background.db'}", poolclass=QueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=0.2,
+    )
+    held = background.connect()
+    server_id = client.post("/servers/", json={"hostname": "bg-bind", "ip_address": "10.0.9.1"}).get_json()["id"]
+    with app.app_context():
+        db.engines["background"] = background
+    try:
+        servers._sim_map.pop(server_id, None)
+        response = client.get(f"/servers/{server_id}/metrics")
+        assert response.status_code == 200
+        metrics = response.get_json()["metrics"]
+        with app.app_context():
+            row = db.session.get(Server, server_id)
+            assert (row.status, row.cpu_usage, row.uptime) == (metrics["state"], metrics["cpu"], metrics["uptime"])
+    finally:
+        with app.app_context():
+            db.engines.pop("background", None)
+        held.close()
+        background.dispose()